@@ -6,8 +6,7 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
-from datetime import datetime
-import json
+from datetime import datetime, timezone
 import re
 import time
 from typing import List, Dict, Optional
@@ -15,6 +14,7 @@ from typing import List, Dict, Optional
 from ansible.errors import AnsibleActionFail
 from ansible.utils.display import Display
 
+from ansible_collections.zpe.zpecloud.plugins.plugin_utils import serialization
 from ansible_collections.zpe.zpecloud.plugins.plugin_utils.utils import (
     exponential_backoff_delay,
 )
@@ -135,7 +135,7 @@ class ActionModule(ZPECloudActionBase):
             f"Applying software upgrade profile {profile_id} to device: {device_id}"
         )
 
-        schedule = datetime.utcnow()
+        schedule = datetime.now(timezone.utc)
         err = self._api_session.apply_software_upgrade(device_id, profile_id, schedule)[
             1
         ]
@@ -160,13 +160,11 @@ class ActionModule(ZPECloudActionBase):
         """Search last upgrade job to find job id.
         Apply software upgrade does not return the job id, then is necessary to search.
         """
-        schedule_formatted = schedule.isoformat()
-
         content, err = self._api_session.search_jobs(serial_number)
         if err:
             raise AnsibleActionFail(f"Failed to search jobs. Error: {err}.")
 
-        resp = json.loads(content)
+        resp = serialization.loads(content)
         job_list = resp.get("list", None)
 
         if job_list is None:
@@ -179,11 +177,12 @@ class ActionModule(ZPECloudActionBase):
                 self._log_info("Failed to get job or schedule from job list.")
                 continue
 
-            job_schedule_formatted = datetime.strptime(
+            # schedules are sent and returned in UTC
+            job_schedule = datetime.strptime(
                 job_schedule, self._api_session.SCHEDULE_FORMAT
-            ).isoformat()
+            ).replace(tzinfo=timezone.utc)
 
-            if schedule_formatted == job_schedule_formatted:
+            if schedule == job_schedule:
                 return job_id, None
 
         return None, "Job ID not found."
@@ -201,7 +200,7 @@ class ActionModule(ZPECloudActionBase):
                 raise AnsibleActionFail(
                     f"Failed to get status for job {job_id}. Err: {err}."
                 )
-            content = json.loads(content)
+            content = serialization.loads(content)
             operation_status = content.get("operation", {}).get("status", None)
             if operation_status is None:
                 raise AnsibleActionFail(f"Failed to get status for job {job_id}.")
@@ -343,7 +342,7 @@ class ActionModule(ZPECloudActionBase):
         if err:
             raise AnsibleActionFail(f"Failed to get device detail. Error: {err}.")
 
-        content = json.loads(content)
+        content = serialization.loads(content)
         version_after_op = content.get("version", None)
         if version_after_op is None:
             raise AnsibleActionFail("Failed to get current device version.")
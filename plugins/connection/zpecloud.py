@@ -20,13 +20,17 @@ author:
   - Daniel Nesvera (@zpe-dnesvera)
 notes:
   - Plugin will poll ZPE Cloud API to fetch status of each job until status is successful.
-  - The poll algorithm uses exponential backoff delay, and will timeout after 1 hour.
+  - The poll algorithm uses exponential backoff delay, from 0.25 up to 5 seconds, and will timeout after O(job_timeout) seconds.
   - Plugin will check file size for put, and fetch tasks. The limit is 100Mb.
   - The inventory variable interpreter_python must be configured to "/usr/bin/python3".
   - The variable interpreter_python is set automatically by zpecloud dynamic inventory.
   - Profile execution may hang if interpreter_python is not defined.
   - ZPE Cloud only applies profile to device that are enrolled, and status is online, or failover.
   - Task will fail with unreachable result if ZPE Cloud is not able to apply profile to device.
+  - The authenticated session, and IDs of devices, are stored in C(~/.ansible/zpecloud), a directory only accessible by the current user,
+    and reused by next tasks, and playbook executions, for 30 minutes.
+  - Stored files that are not owned by the current user, or that other users can access, are ignored.
+  - If ZPE Cloud rejects the stored session, e.g. session expired, it is removed, and plugin authenticates again.
 requirements:
   - requests
 options:
@@ -68,6 +72,25 @@ options:
       - name: ansible_zpecloud_organization
     env:
       - name: ZPECLOUD_ORGANIZATION
+  job_timeout:
+    description:
+      - Maximum time, in seconds, to wait for each job to finish on ZPE Cloud.
+    type: integer
+    default: 3600
+    vars:
+      - name: ansible_zpecloud_job_timeout
+    env:
+      - name: ZPECLOUD_JOB_TIMEOUT
+  compress_uploads:
+    description:
+      - Compress body of script profile uploads with gzip.
+      - Reduces upload size of large files, and commands, on slow links. Requires ZPE Cloud instance that accepts gzip request bodies.
+    type: boolean
+    default: false
+    vars:
+      - name: ansible_zpecloud_compress_uploads
+    env:
+      - name: ZPECLOUD_COMPRESS_UPLOADS
 """
 
 EXAMPLES = r"""
@@ -87,21 +110,21 @@ EXAMPLES = r"""
     shell: uptime -p
 """
 
-import json
+import hashlib
 import os
 import time
 import uuid
 
 try:
-    import requests
+    import requests  # noqa: F401
 except ImportError as err:
     REQUESTS_IMPORT_ERROR = err
 else:
     REQUESTS_IMPORT_ERROR = None
 
-from datetime import datetime
-from typing import Tuple
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
 
 from ansible.errors import (
     AnsibleConnectionFailure,
@@ -112,7 +135,9 @@ from ansible.module_utils._text import to_bytes, to_text
 from ansible.plugins.connection import ConnectionBase
 from ansible.utils.display import Display
 
+from ansible_collections.zpe.zpecloud.plugins.plugin_utils import serialization
 from ansible_collections.zpe.zpecloud.plugins.plugin_utils.zpecloud_api import (
+    JOB_TERMINAL_STATUS_RE,
     ZPECloudAPI,
 )
 from ansible_collections.zpe.zpecloud.plugins.plugin_utils.jinja_templates import (
@@ -122,22 +147,27 @@ from ansible_collections.zpe.zpecloud.plugins.plugin_utils.jinja_templates impor
 )
 
 from ansible_collections.zpe.zpecloud.plugins.plugin_utils.utils import (
-    read_file,
+    make_private_dir,
+    read_private_file,
     write_file,
-    encode_base64,
+    write_private_file,
     decode_base64,
-    compress_file,
+    compress_encode_file,
     extract_file,
     exponential_backoff_delay,
 )
 
-from ansible_collections.zpe.zpecloud.plugins.plugin_utils.types import StringError
+from ansible_collections.zpe.zpecloud.plugins.plugin_utils.types import BooleanError, StringError
 
 display = Display()
 
 MINUTE = 60  # seconds
 MEGABYTE = 1000000  # bytes
 
+# Workers for API requests that are not required to finish the current command, e.g. delete profiles.
+# Ansible runs multiple commands for each task, and these requests run while next commands are executed.
+_BACKGROUND_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
 
 class Connection(ConnectionBase):
     """Plugin to create a transport method between Ansible and Nodegrid device over ZPE CLOUD API."""
@@ -148,8 +178,18 @@ class Connection(ConnectionBase):
 
     def _log_info(self, message: str) -> None:
         """Log information."""
+        if display.verbosity < 1:
+            return
+
         display.v(f"ZPE Cloud connection - Host ID: {self.host_zpecloud_id} - Host SN: {self.host_serial_number} - {message}.")
 
+    def _log_debug(self, message: str) -> None:
+        """Log debug information. Used inside loops, and only shown with high verbosity."""
+        if display.verbosity < 3:
+            return
+
+        display.vvv(f"ZPE Cloud connection - Host ID: {self.host_zpecloud_id} - Host SN: {self.host_serial_number} - {message}.")
+
     def _log_warning(self, message: str) -> None:
         """Log warning."""
         display.warning(f"ZPE Cloud connection - Host ID: {self.host_zpecloud_id} - Host SN: {self.host_serial_number} - {message}.")
@@ -158,16 +198,26 @@ class Connection(ConnectionBase):
         """Initialize ZPE Cloud connection plugin."""
         super(Connection, self).__init__(*args, **kwargs)
         self._api_session = None
+        self._api_session_key = None
+        # profile deletions running in background
+        self._pending_deletions = []
         # id used to reference Nodegrid device in ZPE Cloud
         self.host_zpecloud_id = None
         self.host_serial_number = None
 
         self.timeout_wait_job_finish = 60 * MINUTE  # seconds
-        self.max_delay_wait_job_finish = 3 * MINUTE  # seconds
+        # most of jobs created by Ansible are short, then polling starts fast and slows down for long jobs
+        self.min_delay_wait_job_finish = 0.25  # seconds
+        self.max_delay_wait_job_finish = 5  # seconds
 
         self.max_file_size_put_file = 100 * MEGABYTE  # bytes
         self.max_file_size_fetch_file = 100 * MEGABYTE  # bytes
 
+        # sessions stored on disk are only reused within this period
+        # directory is private to the current user, then other users cannot plant, or read, sessions and device IDs
+        self.session_cache_dir = os.path.join(os.path.expanduser("~"), ".ansible", "zpecloud")
+        self.session_cache_ttl = 30 * MINUTE  # seconds
+
         if REQUESTS_IMPORT_ERROR:
             raise AnsibleConnectionFailure("Requests library must be installed to use this plugin.")
 
@@ -191,10 +241,9 @@ class Connection(ConnectionBase):
 
         organization = self.get_option("organization", None) or os.environ.get("ZPECLOUD_ORGANIZATION", None)
 
-        try:
-            self._api_session = ZPECloudAPI(url)
-        except Exception as err:
-            raise AnsibleConnectionFailure(f"Failed to authenticate on ZPE Cloud. Error: {err}.")
+        self._api_session_key = (url, username, organization)
+        if self._restore_api_session(url):
+            return
 
         result, err = self._api_session.authenticate_with_password(username, password)
         if err:
@@ -205,6 +254,146 @@ class Connection(ConnectionBase):
             if err:
                 raise AnsibleConnectionFailure(f"Failed to switch organization. Error: {err}.")
 
+        self._save_session_cache()
+
+    def _restore_api_session(self, url: str) -> bool:
+        """Create session, and restore authentication stored on disk by previous tasks.
+        Ansible runs each task in a new worker process, then sessions are only shared through disk.
+        return: True if authenticated session was restored."""
+        try:
+            self._api_session = ZPECloudAPI(url)
+        except Exception as err:
+            raise AnsibleConnectionFailure(f"Failed to authenticate on ZPE Cloud. Error: {err}.")
+
+        return self._load_session_cache()
+
+    def _renew_api_session(self) -> bool:
+        """Discard session rejected by ZPE Cloud, e.g. session expired, from disk, then authenticate again.
+        return: True if a new session was created."""
+        if self._api_session is None or not self._api_session.unauthorized:
+            return False
+
+        self._log_info("Session was rejected by ZPE Cloud. Authenticating again.")
+        self._remove_session_cache()
+        self._api_session = None
+        self._create_api_session()
+        return True
+
+    def _call_api(self, method: str, *args, **kwargs) -> Tuple[Any, Optional[str]]:
+        """Call ZPE Cloud API method, and retry it once with a new session if the current one was rejected."""
+        result, err = getattr(self._api_session, method)(*args, **kwargs)
+        if err and self._renew_api_session():
+            result, err = getattr(self._api_session, method)(*args, **kwargs)
+
+        return result, err
+
+    def _cache_path(self, name: str) -> str:
+        """Path for file that stores state shared by connections with the current credentials."""
+        key = hashlib.sha256("|".join(str(k) for k in self._api_session_key).encode()).hexdigest()
+        return os.path.join(self.session_cache_dir, f".zpecloud-{name}-{key}")
+
+    def _session_cache_path(self) -> str:
+        """Path for file that stores the authenticated session for current credentials."""
+        return self._cache_path("session")
+
+    def _device_cache_path(self, serial_number: str) -> str:
+        """Path for file that stores device ID of serial number for current credentials.
+        Each device has its own file, then workers running tasks for different hosts do not overwrite each other."""
+        return self._cache_path(f"device-{hashlib.sha256(serial_number.encode()).hexdigest()}")
+
+    def _read_cache(self, cache_path: str) -> Optional[Dict]:
+        """Read cache file from disk, if it is recent, and private to the current user."""
+        err = make_private_dir(self.session_cache_dir)[1]
+        if err:
+            self._log_warning(f"Ignoring state stored on disk. Error: {err}")
+            return None
+
+        content, err = read_private_file(cache_path, self.session_cache_ttl)
+        if err:
+            self._log_debug(f"Ignoring state stored on disk. Error: {err}")
+            return None
+
+        try:
+            cache = serialization.loads(content)
+        except ValueError:
+            return None
+
+        if not isinstance(cache, dict):
+            return None
+
+        return cache
+
+    def _write_cache(self, cache_path: str, content: bytes) -> BooleanError:
+        """Write cache file to disk, inside directory private to the current user."""
+        result, err = make_private_dir(self.session_cache_dir)
+        if err:
+            return result, err
+
+        return write_private_file(cache_path, content)
+
+    def _load_session_cache(self) -> bool:
+        """Restore authenticated session from disk, if it is recent and still valid on ZPE Cloud."""
+        session_state = self._read_cache(self._session_cache_path())
+        if session_state is None:
+            return False
+
+        err = self._api_session.import_session(session_state)[1]
+        if err:
+            self._log_info(f"Session stored on disk is not valid anymore. Error: {err}")
+            return False
+
+        return True
+
+    def _save_session_cache(self) -> None:
+        """Store authenticated session on disk to be reused by other processes."""
+        try:
+            content = serialization.dumps(self._api_session.export_session())
+        except (TypeError, ValueError) as err:
+            self._log_warning(f"Failed to serialize session. Error: {err}")
+            return
+
+        err = self._write_cache(self._session_cache_path(), content)[1]
+        if err:
+            self._log_warning(f"Failed to store session on disk. Error: {err}")
+
+    def _load_device_cache(self, serial_number: str) -> Optional[str]:
+        """Get device ID found by previous tasks, if it was found recently."""
+        if self._api_session_key is None:
+            return None
+
+        device = self._read_cache(self._device_cache_path(serial_number))
+        if device is None or time.time() - device.get("timestamp", 0) > self.session_cache_ttl:
+            return None
+
+        return device.get("id", None)
+
+    def _save_device_cache(self, serial_number: str, device_id: str) -> None:
+        """Store device ID on disk to be reused by next tasks."""
+        if self._api_session_key is None:
+            return
+
+        content = serialization.dumps({"id": device_id, "timestamp": time.time()})
+        err = self._write_cache(self._device_cache_path(serial_number), content)[1]
+        if err:
+            self._log_warning(f"Failed to store device ID on disk. Error: {err}")
+
+    def _remove_device_cache(self, serial_number: str) -> None:
+        """Remove device ID from disk, e.g. device was enrolled again, and its ID may have changed."""
+        if self._api_session_key is None or serial_number is None:
+            return
+
+        try:
+            os.remove(self._device_cache_path(serial_number))
+        except OSError:
+            pass
+
+    def _remove_session_cache(self) -> None:
+        """Remove authenticated session from disk."""
+        try:
+            os.remove(self._session_cache_path())
+        except OSError:
+            pass
+
     def _wrapper_exec_command(self, cmd: str) -> str:
         """Wrap Ansible command inside a bash command that will be executed by ZPE Cloud."""
         profile_content, err = render_exec_command(cmd)
@@ -220,9 +409,7 @@ class Connection(ConnectionBase):
 
         description = "Script profile generated by Ansible."
 
-        f = None
         try:
-            f = StringIO(profile_content)
             payload_file = (
                 ("name", (None, profile_name)),
                 ("description", (None, description)),
@@ -234,18 +421,14 @@ class Connection(ConnectionBase):
                 ("is_custom_command_enabled", (None, "false")),
                 ("language", (None, "SHELL")),
                 ("dynamic", (None, "false")),
-                ("file", (profile_name, f)),
+                ("file", (profile_name, profile_content.encode())),
             )
 
-            response, err = self._api_session.create_profile(payload_file)
+            response, err = self._call_api("create_profile", payload_file, compress=self.get_option("compress_uploads"))
 
         except Exception as error:
             err = error
 
-        finally:
-            if f:
-                f.close()
-
         if err:
             raise AnsibleError(f"Failed to create script profile in ZPE Cloud. Error: {err}.")
 
@@ -253,44 +436,83 @@ class Connection(ConnectionBase):
         if profile_id is None:
             raise AnsibleError("Failed to retrieve ID from script profile.")
 
-        return response.get("id")
+        return profile_id
 
     def _delete_profile(self, profile_id: str) -> None:
-        """Delete script profile from ZPE Cloud."""
-        err = self._api_session.delete_profile(profile_id)[1]
-        if err:
-            self._log_warning(f"Failed to delete profile from ZPE Cloud. ID: {profile_id}. Error: {err}")
+        """Delete script profile from ZPE Cloud.
+        Deletion runs in background, and it is awaited once the connection is closed."""
+        future = _BACKGROUND_EXECUTOR.submit(self._api_session.delete_profile, profile_id)
+        self._pending_deletions.append((profile_id, future))
+
+    def _run_profile(self, profile_content: str) -> StringError:
+        """Create script profile, apply it to device, and wait job to finish.
+        Profiles carry commands, module code, and arguments, then they are deleted as soon as the job finishes."""
+        profile_id = self._create_profile(profile_content)
+        try:
+            job_id = self._apply_profile(self.host_zpecloud_id, profile_id)
+            return self._wait_job_to_finish(job_id)
+        finally:
+            self._delete_profile(profile_id)
+
+    def _wait_pending_deletions(self) -> None:
+        """Wait profile deletions running in background to finish."""
+        while self._pending_deletions:
+            profile_id, future = self._pending_deletions.pop(0)
+            try:
+                err = future.result()[1]
+            except Exception as error:
+                err = error
+
+            if err:
+                self._log_warning(f"Failed to delete profile from ZPE Cloud. ID: {profile_id}. Error: {err}")
 
     def _apply_profile(self, device_id: str, profile_id: str) -> str:
         """Apply script profile to device."""
         self._log_info(f"Applying profile {profile_id} to device: {device_id}")
 
-        schedule = datetime.utcnow()
-        content, err = self._api_session.apply_profile(device_id, profile_id, schedule)
+        schedule = datetime.now(timezone.utc)
+        content, err = self._call_api("apply_profile", device_id, profile_id, schedule)
         if err:
+            self._remove_device_cache(self.host_serial_number)
             raise AnsibleError(f"Failed to apply script profile {profile_id} to device {self.host_serial_number}. Error: {err}.")
 
-        resp = json.loads(content)
+        resp = serialization.loads(content)
         job_id = resp.get("job_id")
 
         return job_id
 
+    def _get_job_output(self, job_id: str, output_file_url: str) -> StringError:
+        """Download output file generated by job."""
+        content, err = self._call_api("download_file", output_file_url)
+        if err:
+            return None, f"Failed to get output from job {job_id}. Error: {err}"
+
+        return content.decode("utf-8"), None
+
     def _wait_job_to_finish(self, job_id: str) -> StringError:
         """Loop to verify status of job in ZPE Cloud."""
         request_attempt = 0
-        start_time = time.time()
-        while (time.time() - start_time) <= self.timeout_wait_job_finish:
-            self._log_info(f"Checking job status for {job_id} - Attempt {request_attempt}")
-            content, err = self._api_session.get_job(job_id)
+        timeout = self.get_option("job_timeout") or self.timeout_wait_job_finish
+        deadline = time.monotonic() + timeout
+        while time.monotonic() <= deadline:
+            self._log_debug(f"Checking job status for {job_id} - Attempt {request_attempt}")
+            content, err = self._call_api("get_job", job_id)
             if err:
                 # sometimes request may fail with gateway timeout
                 self._log_warning(f"Failed to get status for job {job_id}. Err: {err}.")
-                delay = exponential_backoff_delay(request_attempt, self.max_delay_wait_job_finish)
+                delay = exponential_backoff_delay(request_attempt, self.max_delay_wait_job_finish, self.min_delay_wait_job_finish)
                 request_attempt += 1
                 time.sleep(delay)
                 continue
 
-            content = json.loads(content)
+            if '"status"' in content and not JOB_TERMINAL_STATUS_RE.search(content):
+                # job is still running, so there is no need to parse whole response
+                delay = exponential_backoff_delay(request_attempt, self.max_delay_wait_job_finish, self.min_delay_wait_job_finish)
+                request_attempt += 1
+                time.sleep(delay)
+                continue
+
+            content = serialization.loads(content)
             operation_status = content.get("operation", {}).get("status", None)
             if operation_status is None:
                 raise AnsibleError(f"Failed to get status for job {job_id}.")
@@ -304,22 +526,15 @@ class Connection(ConnectionBase):
             # ZPE Cloud is breaking the tunnel, and for this reason connection will raise an error.
             if (operation_status == "Successful" or operation_status == "Failed") and operation_output_file_url and len(operation_output_file_url) > 0:
                 self._log_info(f"Job {job_id} finished with status {operation_status}")
-                r = requests.get(operation_output_file_url)
-
-                if isinstance(r.content, bytes):
-                    return r.content.decode("utf-8"), None
-                else:
-                    return r.content, None
+                return self._get_job_output(job_id, operation_output_file_url)
 
             elif operation_status == "Cancelled" or operation_status == "Timeout":
                 self._log_info(f"Job {job_id} finished with status {operation_status}")
 
                 if operation_output_file_url and len(operation_output_file_url) > 0:
-                    r = requests.get(operation_output_file_url)
-                    if isinstance(r.content, bytes):
-                        msg = r.content.decode("utf-8")
-                    else:
-                        msg = r.content
+                    msg, err = self._get_job_output(job_id, operation_output_file_url)
+                    if err:
+                        msg = err
 
                     return (
                         None,
@@ -332,24 +547,19 @@ class Connection(ConnectionBase):
                         f"Job finished with status {operation_status}. Not output content.",
                     )
 
-            delay = exponential_backoff_delay(request_attempt, self.max_delay_wait_job_finish)
+            delay = exponential_backoff_delay(request_attempt, self.max_delay_wait_job_finish, self.min_delay_wait_job_finish)
             request_attempt += 1
             time.sleep(delay)
 
         return None, "Job timeout"
 
-    def _process_put_file(self, data: str) -> str:
-        """ """
-        file_zip, err = compress_file(data, self.filename_inside_zip)
-        if err:
-            raise AnsibleError(f"Failed to compress file. Error: {err}.")
-
-        file_base64, err = encode_base64(file_zip)
+    def _process_put_file(self, in_path: str) -> str:
+        """Compress file, and encode it to base64."""
+        file_base64, err = compress_encode_file(in_path, self.filename_inside_zip)
         if err:
-            raise AnsibleError(f"Failed to encode file. Error: {err}.")
+            raise AnsibleError(f"Failed to compress file. Path: {in_path}. Error: {err}.")
 
-        file_base64 = file_base64.decode("utf-8")
-        return file_base64
+        return file_base64.decode("utf-8")
 
     def _process_fetch_file(self, data: str) -> str:
         """ """
@@ -395,19 +605,25 @@ class Connection(ConnectionBase):
 
             self.host_serial_number = self._play_context.remote_addr
 
-            device, err = self._api_session.fetch_device_by_serial_number(self.host_serial_number)
-            if err:
-                raise AnsibleConnectionFailure(f"Failed to fetch host ID. Error: {err}.")
-
-            host_id = device.get("id", None)
+            # device ID found by previous tasks avoids searching device by serial number for each task
+            host_id = self._load_device_cache(self.host_serial_number)
             if host_id is None:
-                raise AnsibleConnectionFailure(f"Failed to find host ID for serial number: {self.host_serial_number}.")
+                device, err = self._call_api("fetch_device_by_serial_number", self.host_serial_number)
+                if err:
+                    raise AnsibleConnectionFailure(f"Failed to fetch host ID. Error: {err}.")
+
+                host_id = device.get("id", None)
+                if host_id is None:
+                    raise AnsibleConnectionFailure(f"Failed to find host ID for serial number: {self.host_serial_number}.")
+
+                self._save_device_cache(self.host_serial_number, host_id)
 
             self.host_zpecloud_id = host_id
 
         # check if device can receive profiles
-        is_device_ready, err = self._api_session.can_apply_profile_on_device(self.host_serial_number)
+        is_device_ready, err = self._call_api("can_apply_profile_on_device", self.host_serial_number)
         if err or not is_device_ready:
+            self._remove_device_cache(self.host_serial_number)
             raise AnsibleConnectionFailure(f"Nodegrid device is not ready to receive profiles via ZPE Cloud. {err}.")
 
         return self
@@ -433,20 +649,11 @@ class Connection(ConnectionBase):
 
         profile_content = self._wrapper_exec_command(cmd)
 
-        # create a profile in ZPE Cloud
-        profile_id = self._create_profile(profile_content)
-
-        # Apply profile to Nodegrid device
-        job_id = self._apply_profile(self.host_zpecloud_id, profile_id)
-
-        # Wait profile to finish
-        job_output, err = self._wait_job_to_finish(job_id)
+        # Run profile on Nodegrid device via ZPE Cloud
+        job_output, err = self._run_profile(profile_content)
         if err:
             return (1, b"", to_bytes(err))
 
-        # Delete profile from configuration list
-        self._delete_profile(profile_id)
-
         return (0, to_bytes(job_output), b"")
 
     def put_file(self, in_path: str, out_path: str) -> None:
@@ -465,29 +672,16 @@ class Connection(ConnectionBase):
         if file_stat.st_size > self.max_file_size_put_file:
             raise AnsibleError(f"Size of file {in_path} is bigger than limit of {self.max_file_size_put_file} bytes.")
 
-        file_content, err = read_file(in_path)
-        if err:
-            raise AnsibleError(f"Failed to read file. Path: {in_path}. Error: {err}.")
-
         # Zip file content and encode to base64
-        file_content = self._process_put_file(file_content)
+        file_content = self._process_put_file(in_path)
 
         profile_content = self._wrapper_put_file(file_content, out_path)
 
-        # Create profile in ZPE Cloud
-        profile_id = self._create_profile(profile_content)
-
-        # Apply profile to Nodegrid device
-        job_id = self._apply_profile(self.host_zpecloud_id, profile_id)
-
-        # Wait profile to finish
-        err = self._wait_job_to_finish(job_id)[1]
+        # Run profile on Nodegrid device via ZPE Cloud
+        err = self._run_profile(profile_content)[1]
         if err:
             raise AnsibleError(f"File transfer failed. Error: {err}.")
 
-        # Delete profile from configuration list
-        self._delete_profile(profile_id)
-
     def fetch_file(self, in_path: str, out_path: str) -> None:
         """Ansible connection override function responsible to transfer file from host to local.
         A script profile is used to fetch file from host via ZPE Cloud.
@@ -499,19 +693,11 @@ class Connection(ConnectionBase):
 
         profile_content = self._wrapper_fetch_file(in_path)
 
-        # Create profile in ZPE Cloud
-        profile_id = self._create_profile(profile_content)
-
-        # Apply profile to Nodegrid device
-        job_id = self._apply_profile(self.host_zpecloud_id, profile_id)
-
-        # Wait profile to finish
-        job_output, err = self._wait_job_to_finish(job_id)
+        # Run profile on Nodegrid device via ZPE Cloud
+        job_output, err = self._run_profile(profile_content)
         if err:
             raise AnsibleError(f"File transfer failed. Error: {err}.")
 
-        self._delete_profile(profile_id)
-
         # Decode output from base64, and extract file from zip
         file_content = self._process_fetch_file(job_output)
 
@@ -522,16 +708,26 @@ class Connection(ConnectionBase):
 
     def close(self) -> None:
         """Ansible connection override function responsible to close tunnel to host.
-        A logout from ZPE Cloud API will be performed."""
+        Ansible closes the connection after each task, then the authenticated session is kept
+        to be reused by the next connections. Logout is only performed on reset.
+        Profile deletions still running in background are awaited."""
         self._log_info("[close override]")
-        if self._api_session:
-            err = self._api_session.logout()[1]
-            if err:
-                self._log_warning(f"Failed to close session from ZPE Cloud. Error: {err}")
+        self._wait_pending_deletions()
+        self._api_session = None
+        self._connected = False
 
     def reset(self) -> None:
         """Ansible connection override function responsible to reset tunnel to host.
         A logout, followed by a login on ZPE Cloud API will be performed."""
         self._log_info("[reset override]")
+        self._wait_pending_deletions()
+        if self._api_session:
+            if self._api_session_key:
+                self._remove_session_cache()
+
+            err = self._api_session.logout()[1]
+            if err:
+                self._log_warning(f"Failed to close session from ZPE Cloud. Error: {err}")
+
         self.close()
         self._connect()
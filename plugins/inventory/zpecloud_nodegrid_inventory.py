@@ -28,8 +28,11 @@ description:
 notes:
   - Ansible groups names, and variables, can only include letters, numbers, and underscores. Invalid characters will be replaced by underscore.
   - If you have a ZPE Cloud site named "My site-1", it will appear on the inventory as zpecloud_site_my_site_1. The same happens for groups, and custom fields.
+  - If cache is enabled, responses from ZPE Cloud are reused until O(cache_timeout), and inventory is built without requests to ZPE Cloud.
 author:
   - Daniel Nesvera (@zpe-dnesvera)
+extends_documentation_fragment:
+  - inventory_cache
 options:
   url:
     description:
@@ -80,18 +83,34 @@ url: https://zpecloud.com
 username: myuser@mycompany.com
 password: mysecurepassword
 organization: "My second organization"
+
+# Sample configuration file for dynamic inventory based on ZPE Cloud. Responses are cached on disk for 10 minutes.
+plugin: zpe.zpecloud.zpecloud_nodegrid_inventory
+url: https://zpecloud.com
+username: myuser@mycompany.com
+password: mysecurepassword
+cache: true
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: /tmp/zpecloud_inventory_cache
+cache_timeout: 600
 """
 
+import hashlib
 import re
 import os
-from typing import Dict, List
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
-from ansible.plugins.inventory import BaseInventoryPlugin
+from ansible import constants as C
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable
 from ansible.errors import AnsibleParserError
 
 from ansible_collections.zpe.zpecloud.plugins.plugin_utils.zpecloud_api import (
     ZPECloudAPI,
 )
+from ansible_collections.zpe.zpecloud.plugins.plugin_utils.types import ListDictError
 
 
 class ZPECloudMissingBodyInfoError(Exception):
@@ -100,18 +119,6 @@ class ZPECloudMissingBodyInfoError(Exception):
     pass
 
 
-class ZPECloudDefaultCustomField(Exception):
-    """Raised once default custom field is created. Ansible will not use default ones."""
-
-    pass
-
-
-class ZPECloudDisabledCustomField(Exception):
-    """Raised once custom field is disabled on ZPE Cloud."""
-
-    pass
-
-
 class GroupPrefix:
     """Prefixes used to differentiate inventory from ZPE Cloud from user defined one."""
 
@@ -155,225 +162,250 @@ class CustomFieldScope:
     DEVICE = "device"
 
 
+# Availability of Nodegrid devices based on status from ZPE Cloud. Any other status is considered offline.
+_AVAILABILITY_STATUS = {
+    AvailabilityStatus.ONLINE: AvailabilityStatus.ONLINE,
+    AvailabilityStatus.FAILOVER: AvailabilityStatus.FAILOVER,
+}
+
+# Default groups for Nodegrid devices based on enrollment, and availability status
+_ENROLL_STATUS_GROUPS = {
+    EnrollStatus.ENROLLED: ZPECloudDefaultGroups.DEVICE_ENROLLED,
+    EnrollStatus.AVAILABLE: ZPECloudDefaultGroups.DEVICE_AVAILABLE,
+}
+_AVAILABILITY_STATUS_GROUPS = {
+    AvailabilityStatus.ONLINE: ZPECloudDefaultGroups.DEVICE_ONLINE,
+    AvailabilityStatus.FAILOVER: ZPECloudDefaultGroups.DEVICE_FAILOVER,
+    AvailabilityStatus.OFFLINE: ZPECloudDefaultGroups.DEVICE_OFFLINE,
+}
+
+# Suffixes of inventory files consumed by this plugin
+_VALID_SUFFIXES = ("zpecloud.yaml", "zpecloud.yml")
+
+_NAME_SANITIZATION_RE = re.compile(r"[^A-Za-z0-9\_]")
+# same replacement as _NAME_SANITIZATION_RE, restricted to ASCII names
+_NAME_SANITIZATION_TABLE = {
+    c: "_" for c in range(128) if not (chr(c).isalnum() or chr(c) == "_")
+}
+_VERSION_RE = re.compile(r"^v[0-9.]*")
+
+
+@lru_cache(maxsize=4096)
 def name_sanitization(name: str) -> str:
-    """Sanitize names of hosts, groups, and variables, to be complaint with requirements from Ansible."""
-    regex = re.compile(r"[^A-Za-z0-9\_]")
+    """Sanitize names of hosts, groups, and variables, to be complaint with requirements from Ansible.
+    Group, and site, names are repeated by references from custom fields, then results are cached."""
     name = name.lower()
-    return regex.sub("_", name)
+    if name.isascii():
+        return name.translate(_NAME_SANITIZATION_TABLE)
+    return _NAME_SANITIZATION_RE.sub("_", name)
 
 
 class ZPECloudHost:
     """Object to represent a Nodegrid device inside Ansible inventory."""
 
+    __slots__ = (
+        "device_id",
+        "serial_number",
+        "enroll_status",
+        "hostname",
+        "model",
+        "version",
+        "status",
+        "site_id",
+        "group_ids",
+    )
+
     def __init__(self, device_info: Dict, enroll_status: EnrollStatus) -> None:
-        if not isinstance(device_info, Dict):
+        if not isinstance(device_info, dict):
             raise TypeError("Dictionary expected.")
 
-        device_id = device_info.get("id", None)
+        device_id = device_info.get("id")
         if device_id is None:
             raise ZPECloudMissingBodyInfoError("Failed to get ID from Nodegrid device.")
-        else:
-            self.device_id = device_id
+        self.device_id = device_id
 
-        serial_number = device_info.get("serial_number", None)
+        serial_number = device_info.get("serial_number")
         if serial_number is None:
             raise ZPECloudMissingBodyInfoError(
                 f"Failed to get serial number from Nodegrid device. Hostname: {device_info.get('hostname')}."
             )
-        else:
-            self.serial_number = serial_number
+        self.serial_number = serial_number
 
         self.enroll_status = enroll_status
+        self.hostname = device_info.get("hostname") or ""
+        self.model = device_info.get("model") or ""
 
-        hostname = device_info.get("hostname", None)
-        if hostname is None:
-            self.hostname = ""
-        else:
-            self.hostname = hostname
-
-        model = device_info.get("model", None)
-        if model is None:
-            self.model = ""
-        else:
-            self.model = model
-
-        version = device_info.get("version", None)
-        if version is None:
-            self.version = ""
-        else:
-            version = re.search("^v[0-9.]*", version)
-            if version is None:
-                self.version = ""
-            else:
-                self.version = version.group().replace("v", "")
+        version = _VERSION_RE.match(device_info.get("version") or "")
+        self.version = version.group().replace("v", "") if version else ""
 
         status = device_info.get("device_status")
         if status is None:
             raise ZPECloudMissingBodyInfoError(
                 f"Failed to get status from Nodegrid device. Hostname: {device_info.get('hostname')}"
             )
-        else:
-            status = status.lower()
-
-        if status == AvailabilityStatus.ONLINE:
-            self.status = AvailabilityStatus.ONLINE
-        elif status == AvailabilityStatus.FAILOVER:
-            self.status = AvailabilityStatus.FAILOVER
-        else:
-            self.status = AvailabilityStatus.OFFLINE
-
-        site = device_info.get("site", None)
-        if site:
-            self.site_id = site.get("id", None)
-        else:
-            self.site_id = None
-
-        groups = device_info.get("groups", None)
-        self.group_ids = []
-        if groups:
-            for g in groups:
-                group_id = g.get("id", None)
-                if group_id:
-                    self.group_ids.append(group_id)
+        self.status = _AVAILABILITY_STATUS.get(status.lower(), AvailabilityStatus.OFFLINE)
+
+        site = device_info.get("site")
+        self.site_id = site.get("id") if site else None
+
+        groups = device_info.get("groups") or []
+        self.group_ids = [g.get("id") for g in groups if g.get("id")]
 
 
 class ZPECloudGroup:
     """Object to represent a ZPE Cloud group inside Ansible inventory."""
 
+    __slots__ = ("group_id", "name")
+
     def __init__(self, group_info: Dict) -> None:
-        if not isinstance(group_info, Dict):
+        if not isinstance(group_info, dict):
             raise TypeError("Dictionary expected.")
 
-        group_id = group_info.get("id", None)
+        group_id = group_info.get("id")
         if group_id is None:
             raise ZPECloudMissingBodyInfoError("Failed to get ID from ZPE Cloud group.")
-        else:
-            self.group_id = group_id
+        self.group_id = group_id
 
-        name = group_info.get("name", None)
+        name = group_info.get("name")
         if name is None:
             raise ZPECloudMissingBodyInfoError(
                 "Failed to get name from ZPE Cloud group."
             )
-        else:
-            name = name_sanitization(name)
-            self.name = f"{GroupPrefix.GROUP}{name}"
+        self.name = f"{GroupPrefix.GROUP}{name_sanitization(name)}"
 
 
 class ZPECloudSite:
     """Object to represent a ZPE Cloud site inside Ansible inventory."""
 
+    __slots__ = ("site_id", "name")
+
     def __init__(self, site_info: Dict) -> None:
-        if not isinstance(site_info, Dict):
+        if not isinstance(site_info, dict):
             raise TypeError("Dictionary expected.")
 
-        site_id = site_info.get("id", None)
+        site_id = site_info.get("id")
         if site_id is None:
             raise ZPECloudMissingBodyInfoError("Failed to get ID from ZPE Cloud site.")
-        else:
-            self.site_id = site_id
+        self.site_id = site_id
 
-        name = site_info.get("name", None)
+        name = site_info.get("name")
         if name is None:
             raise ZPECloudMissingBodyInfoError(
                 "Failed to get name from ZPE Cloud site."
             )
-        else:
-            name = name_sanitization(name)
-            self.name = f"{GroupPrefix.SITE}{name}"
+        self.name = f"{GroupPrefix.SITE}{name_sanitization(name)}"
+
+
+def _global_scope_reference(reference: Optional[str], name: str) -> Optional[str]:
+    """Reference of custom fields with global scope is not used, then it is kept as is."""
+    return reference
+
+
+def _named_scope_reference(reference: Optional[str], name: str) -> str:
+    """Reference of custom fields with group or site scope is the name of the group or site."""
+    if reference is None:
+        raise ZPECloudMissingBodyInfoError(
+            f"Failed to get reference from ZPE Cloud custom field. Custom field name: {name}."
+        )
+    return name_sanitization(reference)
+
+
+def _device_scope_reference(reference: Optional[str], name: str) -> str:
+    """Reference of custom fields with device scope ends with the serial number of the device."""
+    if reference is None:
+        raise ZPECloudMissingBodyInfoError(
+            f"Failed to get reference from ZPE Cloud custom field. Custom field name: {name}."
+        )
+
+    serial_number = reference.rpartition(" ")[2]
+    if not serial_number:
+        raise ZPECloudMissingBodyInfoError(
+            f"Failed to get reference from ZPE Cloud custom field with device scope. Custom field name: {name}."
+        )
+    return serial_number
+
+
+# Resolve reference of custom fields based on their scope
+_CUSTOM_FIELD_SCOPE_HANDLERS = {
+    CustomFieldScope.GLOBAL: _global_scope_reference,
+    CustomFieldScope.GROUP: _named_scope_reference,
+    CustomFieldScope.SITE: _named_scope_reference,
+    CustomFieldScope.DEVICE: _device_scope_reference,
+}
+
+# Prefix of inventory groups referenced by custom fields with group or site scope
+_CUSTOM_FIELD_GROUP_PREFIXES = {
+    CustomFieldScope.GROUP: GroupPrefix.GROUP,
+    CustomFieldScope.SITE: GroupPrefix.SITE,
+}
 
 
 class ZPECustomFields:
     """Object to represent a ZPE Cloud custom field inside Ansible inventory."""
 
+    __slots__ = ("name", "scope", "reference", "value", "enabled", "dynamic")
+
+    @classmethod
+    def from_dict(cls, custom_field_info: Dict) -> Optional["ZPECustomFields"]:
+        """Create custom field from ZPE Cloud response.
+        Default custom fields, and disabled ones, are not used on Ansible, then None is returned
+        without building the object."""
+        if isinstance(custom_field_info, dict):
+            name = custom_field_info.get("name")
+            if name is not None and "." in name:
+                return None
+
+            if not custom_field_info.get("enabled", False):
+                return None
+
+        return cls(custom_field_info)
+
     def __init__(self, custom_field_info: Dict) -> None:
-        if not isinstance(custom_field_info, Dict):
+        if not isinstance(custom_field_info, dict):
             raise TypeError("Dictionary expected.")
 
-        name = custom_field_info.get("name", None)
+        name = custom_field_info.get("name")
         if name is None:
             raise ZPECloudMissingBodyInfoError(
                 "Failed to get name from ZPE Cloud custom field."
             )
-        elif "." in name:
-            raise ZPECloudDefaultCustomField(
-                f"Default custom fields from ZPE Cloud is not used on Ansible. Custom field name: {name}."
-            )
-        else:
-            name = name_sanitization(name)
-            self.name = f"{GroupPrefix.CUSTOM_FIELD}{name}"
+        name = name_sanitization(name)
+        self.name = f"{GroupPrefix.CUSTOM_FIELD}{name}"
 
-        enabled = custom_field_info.get("enabled", False)
-        if not enabled:
-            raise ZPECloudDisabledCustomField(f"Custom field {name} is disabled.")
+        reference = custom_field_info.get("reference")
 
-        reference = custom_field_info.get("reference", None)
-
-        scope = custom_field_info.get("scope", None)
+        scope = custom_field_info.get("scope")
         if scope is None:
             raise ZPECloudMissingBodyInfoError(
                 f"Failed to get scope from ZPE CLoud custom field. Custom field name: {name}."
             )
-        else:
-            self.scope = scope
-
-        if scope == CustomFieldScope.GLOBAL:
-            self.reference = reference
-
-        elif (
-            scope == CustomFieldScope.GROUP
-            or scope == CustomFieldScope.SITE
-            or scope == CustomFieldScope.DEVICE
-        ):
-            # reference will be null for global, but must have value for other scopes
-            if reference is None:
-                raise ZPECloudMissingBodyInfoError(
-                    f"Failed to get reference from ZPE Cloud custom field. Custom field name: {name}."
-                )
+        self.scope = scope
 
-            if scope == CustomFieldScope.DEVICE:
-                serial_number = reference.split(" ")[-1]
-                if len(serial_number) == 0:
-                    raise ZPECloudMissingBodyInfoError(
-                        f"Failed to get reference from ZPE Cloud custom field with device scope. Custom field name: {name}."
-                    )
-
-                self.reference = serial_number
-
-            else:
-                self.reference = name_sanitization(reference)
-
-        else:
+        scope_handler = _CUSTOM_FIELD_SCOPE_HANDLERS.get(scope)
+        if scope_handler is None:
             raise ZPECloudMissingBodyInfoError(
                 f"Invalid scope from ZPE Cloud custom field. Custom field name: {name}."
             )
+        self.reference = scope_handler(reference, name)
 
-        value = custom_field_info.get("value", None)
+        value = custom_field_info.get("value")
         if value is None:
             raise ZPECloudMissingBodyInfoError(
                 f"Failed to get value from ZPE Cloud custom field. Custom field name: {name}."
             )
-        else:
-            self.value = value
+        self.value = value
 
-        enabled = custom_field_info.get("enabled", None)
-        if enabled is None:
-            raise ZPECloudMissingBodyInfoError(
-                f"Failed get enabled property from ZPE Cloud custom field. Custom field name: {name}."
-            )
-        else:
-            self.enabled = enabled
+        self.enabled = custom_field_info.get("enabled", False)
 
-        dynamic = custom_field_info.get("dynamic", None)
+        dynamic = custom_field_info.get("dynamic")
         if dynamic is None:
             raise ZPECloudMissingBodyInfoError(
                 f"Failed to get dynamic property from ZPE Cloud custom field. Custom field name: {name}."
             )
-        else:
-            self.dynamic = dynamic
+        self.dynamic = dynamic
 
 
-class InventoryModule(BaseInventoryPlugin):
+class InventoryModule(BaseInventoryPlugin, Cacheable):
     NAME = "zpe.zpecloud.zpecloud_nodegrid_inventory"
 
     # Default python interpreter for Nodegrid devices
@@ -381,80 +413,90 @@ class InventoryModule(BaseInventoryPlugin):
 
     def _validate_devices(
         self, devices: List, enroll_status: EnrollStatus
-    ) -> List[ZPECloudHost]:
-        valid_devices = []
+    ) -> Iterator[ZPECloudHost]:
         for d in devices:
             try:
-                valid_devices.append(ZPECloudHost(d, enroll_status))
+                yield ZPECloudHost(d, enroll_status)
             except Exception as err:
                 self.display.warning(
                     f"Failed to validate Nodegrid device. Error: {err}"
                 )
 
-        return valid_devices
-
-    def _validate_sites(self, sites: List) -> List[ZPECloudSite]:
-        valid_sites = []
+    def _validate_sites(self, sites: List) -> Iterator[ZPECloudSite]:
         for s in sites:
             try:
-                valid_sites.append(ZPECloudSite(s))
+                yield ZPECloudSite(s)
             except Exception as err:
                 self.display.warning(f"Failed to validate ZPE Cloud site. Error: {err}")
 
-        return valid_sites
-
-    def _validate_groups(self, groups: List) -> List[ZPECloudGroup]:
-        valid_groups = []
+    def _validate_groups(self, groups: List) -> Iterator[ZPECloudGroup]:
         for g in groups:
             try:
-                valid_groups.append(ZPECloudGroup(g))
+                yield ZPECloudGroup(g)
             except Exception as err:
                 self.display.warning(
                     f"Failed to validate ZPE Cloud group. Error: {err}"
                 )
 
-        return valid_groups
-
-    def _validate_custom_fields(self, custom_fields: List) -> List[ZPECustomFields]:
-        valid_custom_fields = []
+    def _validate_custom_fields(self, custom_fields: List) -> Iterator[ZPECustomFields]:
         for cf in custom_fields:
             try:
-                valid_custom_fields.append(ZPECustomFields(cf))
-            except ZPECloudDefaultCustomField as msg:
-                self.display.debug(f"Custom field will be discarded. {msg}")
-            except ZPECloudDisabledCustomField as msg:
-                self.display.debug(f"Custom field will be discarded. {msg}")
+                custom_field = ZPECustomFields.from_dict(cf)
             except Exception as err:
                 self.display.warning(f"Failed to validate custom field. Error: {err}")
+                continue
+
+            if custom_field is None:
+                # default and disabled custom fields are common, only format message when debug is enabled
+                if C.DEFAULT_DEBUG:
+                    self.display.debug(f"Custom field will be discarded. Default or disabled custom field: {cf.get('name')}.")
+                continue
+
+            yield custom_field
 
-        return valid_custom_fields
+    def _fetch_resources(self) -> Dict[str, ListDictError]:
+        """Fetch resources from ZPE Cloud.
+        Requests are independent, then they are executed concurrently over the session connections."""
+        fetchers = {
+            "groups": self._api_session.get_groups,
+            "sites": self._api_session.get_sites,
+            "enrolled_devices": self._api_session.get_enrolled_devices,
+            "available_devices": self._api_session.get_available_devices,
+            "custom_fields": self._api_session.get_custom_fields,
+        }
+
+        with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
+            futures = {name: executor.submit(fetch) for name, fetch in fetchers.items()}
+
+        return {name: future.result() for name, future in futures.items()}
 
     def _parse_devices(
-        self, zpecloud_groups: List[ZPECloudGroup], zpecloud_sites: List[ZPECloudSite]
+        self,
+        enrolled_response: ListDictError,
+        available_response: ListDictError,
+        zpecloud_groups: List[ZPECloudGroup],
+        zpecloud_sites: List[ZPECloudSite],
     ) -> List[ZPECloudHost]:
-        device_list = []
-        enrolled_devices, err = self._api_session.get_enrolled_devices()
+        enrolled_devices, err = enrolled_response
         if err:
             raise AnsibleParserError(
                 f"Failed to get devices from enroll tab. Error: {err}."
             )
 
-        device_list += self._validate_devices(enrolled_devices, EnrollStatus.ENROLLED)
-
-        available_devices, err = self._api_session.get_available_devices()
+        available_devices, err = available_response
         if err:
             raise AnsibleParserError(
                 f"Failed to get devices from available tab. Error: {err}."
             )
 
-        device_list += self._validate_devices(available_devices, EnrollStatus.AVAILABLE)
+        device_list = list(self._validate_devices(enrolled_devices, EnrollStatus.ENROLLED))
+        device_list.extend(self._validate_devices(available_devices, EnrollStatus.AVAILABLE))
 
-        if len(device_list) == 0:
+        device_count = len(device_list)
+        if device_count == 0:
             AnsibleParserError("No device found in ZPE Cloud.")
 
-        discarded_count = (
-            len(available_devices) + len(enrolled_devices) - len(device_list)
-        )
+        discarded_count = len(available_devices) + len(enrolled_devices) - device_count
         if discarded_count > 0:
             self.display.warning(
                 f"{discarded_count} Nodegrid devices were discarded due required fields missing. "
@@ -462,119 +504,132 @@ class InventoryModule(BaseInventoryPlugin):
 
         # Devices are mapped to sites, and groups, by its IDs but name is required to store inside inventory
         # Create a lookup table for sites, and groups, mapping id to names
-        group_lookup = {}
-        for g in zpecloud_groups:
-            group_lookup[g.group_id] = g.name
+        group_lookup = {g.group_id: g.name for g in zpecloud_groups}
+        site_lookup = {s.site_id: s.name for s in zpecloud_sites}
 
-        site_lookup = {}
-        for s in zpecloud_sites:
-            site_lookup[s.site_id] = s.name
+        # inventory methods are called multiple times for each device
+        add_host = self.inventory.add_host
+        add_child = self.inventory.add_child
+        hosts = self.inventory.hosts
 
         for device in device_list:
             # add host
             host_id = device.serial_number
-            self.inventory.add_host(host_id)
+            add_host(host_id)
 
             # set host variables
-            self.inventory.set_variable(host_id, "serial_number", device.serial_number)
-            self.inventory.set_variable(host_id, "zpecloud_id", device.device_id)
-            self.inventory.set_variable(host_id, "hostname", device.hostname)
-            self.inventory.set_variable(host_id, "version", device.version)
-            self.inventory.set_variable(host_id, "status", device.status)
-            self.inventory.set_variable(host_id, "model", device.model)
+            # names are fixed and valid, and values are not mappings, then set_variable checks can be skipped
+            hosts[host_id].vars.update(
+                {
+                    "serial_number": device.serial_number,
+                    "zpecloud_id": device.device_id,
+                    "hostname": device.hostname,
+                    "version": device.version,
+                    "status": device.status,
+                    "model": device.model,
+                }
+            )
 
             # assign device to group based on enrollment status
-            if device.enroll_status == EnrollStatus.ENROLLED:
-                self.inventory.add_child(ZPECloudDefaultGroups.DEVICE_ENROLLED, host_id)
-            else:
-                self.inventory.add_child(
-                    ZPECloudDefaultGroups.DEVICE_AVAILABLE, host_id
-                )
+            add_child(_ENROLL_STATUS_GROUPS.get(device.enroll_status, ZPECloudDefaultGroups.DEVICE_AVAILABLE), host_id)
 
             # assign device to group based on availability status
-            if device.status == AvailabilityStatus.ONLINE:
-                self.inventory.add_child(ZPECloudDefaultGroups.DEVICE_ONLINE, host_id)
-            elif device.status == AvailabilityStatus.FAILOVER:
-                self.inventory.add_child(ZPECloudDefaultGroups.DEVICE_FAILOVER, host_id)
-            else:
-                self.inventory.add_child(ZPECloudDefaultGroups.DEVICE_OFFLINE, host_id)
+            add_child(_AVAILABILITY_STATUS_GROUPS[device.status], host_id)
 
             # assign device to ZPE Cloud sites
             if device.site_id:
                 site_n = site_lookup.get(device.site_id, None)
                 if site_n:
-                    self.inventory.add_child(site_n, host_id)
+                    add_child(site_n, host_id)
 
             # assign device to ZPE Cloud groups
             for group_id in device.group_ids:
                 group_n = group_lookup.get(group_id, None)
                 if group_n:
-                    self.inventory.add_child(group_n, host_id)
+                    add_child(group_n, host_id)
 
         return device_list
 
-    def _parse_groups(self) -> List[ZPECloudGroup]:
-        groups, err = self._api_session.get_groups()
+    def _parse_groups(self, response: ListDictError) -> List[ZPECloudGroup]:
+        groups, err = response
         if err:
             self.display.v(f"Failed to get groups from ZPE Cloud. Error: {err}.")
             return []
 
-        group_list = self._validate_groups(groups)
-        for group in group_list:
+        group_list = []
+        for group in self._validate_groups(groups):
             self.inventory.add_group(group.name)
+            group_list.append(group)
 
         return group_list
 
-    def _parse_sites(self) -> List[ZPECloudSite]:
-        sites, err = self._api_session.get_sites()
+    def _parse_sites(self, response: ListDictError) -> List[ZPECloudSite]:
+        sites, err = response
         if err:
             self.display.v(f"Failed to get sites from ZPE Cloud. Error: {err}.")
             return []
 
-        site_list = self._validate_sites(sites)
-        for site in site_list:
+        site_list = []
+        for site in self._validate_sites(sites):
             self.inventory.add_group(site.name)
+            site_list.append(site)
 
         return site_list
 
+    @staticmethod
+    def _custom_field_target(
+        cf: ZPECustomFields, inventory_groups: Set[str], device_serial_numbers: Set[str]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Find group, or host, that receives custom field as variable.
+        return: (group name, host ID). Both are None if target is not inside inventory."""
+        if cf.scope == CustomFieldScope.GLOBAL:
+            return "all", None
+
+        if cf.scope == CustomFieldScope.DEVICE:
+            if cf.reference in device_serial_numbers:
+                return None, cf.reference
+            return None, None
+
+        # check if already exists a group, or site, inside inventory
+        group_name = f"{_CUSTOM_FIELD_GROUP_PREFIXES[cf.scope]}{cf.reference}"
+        if group_name in inventory_groups:
+            return group_name, None
+        return None, None
+
     def _parse_custom_fields(
-        self, devices: List[ZPECloudHost]
+        self, response: ListDictError, devices: List[ZPECloudHost]
     ) -> List[ZPECustomFields]:
-        custom_fields, err = self._api_session.get_custom_fields()
+        custom_fields, err = response
         if err:
             self.display.v(f"Failed to get custom fields from ZPE Cloud. Error: {err}.")
             return []
 
-        cf_list = self._validate_custom_fields(custom_fields)
+        # custom fields reference devices by its serial number, that is used as index of the inventory
+        device_serial_numbers = {d.serial_number for d in devices}
 
-        # custom fields reference devices by its hostname, then is necessary to create a lookup table from
-        # hostname to serial number that is used as index of the inventory
-        device_lookup = {}
-        for d in devices:
-            device_lookup[d.serial_number] = d
+        # only membership is required, avoid building the hosts list of each group
+        # custom fields do not create groups, then a single snapshot is valid for the whole loop
+        inventory_groups = set(self.inventory.groups)
 
-        # get a dictionary of all groups already inside inventory
-        inventory_groups = self.inventory.get_groups_dict()
+        # custom fields are grouped by their target, then variables are set once for each group and host
+        # names are sanitized with a fixed prefix, and values are not mappings, then set_variable checks can be skipped
+        group_vars = defaultdict(dict)
+        host_vars = defaultdict(dict)
 
-        for cf in cf_list:
-            if cf.scope == CustomFieldScope.GLOBAL:
-                self.inventory.set_variable("all", cf.name, cf.value)
+        for cf in self._validate_custom_fields(custom_fields):
+            group_name, host_id = self._custom_field_target(cf, inventory_groups, device_serial_numbers)
+            if group_name:
+                group_vars[group_name][cf.name] = cf.value
+            elif host_id:
+                host_vars[host_id][cf.name] = cf.value
 
-            elif cf.scope == CustomFieldScope.GROUP:
-                # check if already exists a group inside inventory
-                group_name = f"{GroupPrefix.GROUP}{cf.reference}"
-                if inventory_groups.get(group_name, None):
-                    self.inventory.set_variable(group_name, cf.name, cf.value)
+        groups = self.inventory.groups
+        for group_name, variables in group_vars.items():
+            groups[group_name].vars.update(variables)
 
-            elif cf.scope == CustomFieldScope.SITE:
-                # check if already exists a group inside inventory
-                site_name = f"{GroupPrefix.SITE}{cf.reference}"
-                if inventory_groups.get(site_name, None):
-                    self.inventory.set_variable(site_name, cf.name, cf.value)
-
-            else:
-                if device_lookup.get(cf.reference, None):
-                    self.inventory.set_variable(cf.reference, cf.name, cf.value)
+        hosts = self.inventory.hosts
+        for host_id, variables in host_vars.items():
+            hosts[host_id].vars.update(variables)
 
     def _set_default_variables(self, devices: List[ZPECloudHost]) -> None:
         """Set default variables required for zpecloud connection."""
@@ -588,39 +643,41 @@ class InventoryModule(BaseInventoryPlugin):
 
     def verify_file(self, path):
         """return true/false if this is possibly a valid file for this plugin to consume"""
-        valid = False
-        if super(InventoryModule, self).verify_file(path):
-            # base class verifies that file exists and is readable by current user
-            if path.endswith(("zpecloud.yaml", "zpecloud.yml")):
-                valid = True
-        return valid
-
-    def _create_api_session(self) -> None:
-        url = self.get_option("url", None) or os.environ.get("ZPECLOUD_URL", None)
-
-        # default for url
-        if url is None:
-            url = "https://zpecloud.com"
-
-        username = self.get_option("username", None) or os.environ.get(
-            "ZPECLOUD_USERNAME", None
-        )
+        # base class verifies that file exists and is readable by current user
+        return super().verify_file(path) and path.endswith(_VALID_SUFFIXES)
+
+    def _get_option_or_env(self, option: str, env: str) -> Optional[str]:
+        return self.get_option(option) or os.environ.get(env, None)
+
+    def _get_config(self) -> Dict[str, Optional[str]]:
+        """Read ZPE Cloud configuration from plugin options, or environment variables."""
+        return {
+            # default for url
+            "url": self._get_option_or_env("url", "ZPECLOUD_URL") or "https://zpecloud.com",
+            "username": self._get_option_or_env("username", "ZPECLOUD_USERNAME"),
+            "password": self._get_option_or_env("password", "ZPECLOUD_PASSWORD"),
+            "organization": self._get_option_or_env("organization", "ZPECLOUD_ORGANIZATION"),
+        }
+
+    def _create_api_session(self, config: Optional[Dict[str, Optional[str]]] = None) -> None:
+        if config is None:
+            config = self._get_config()
+
+        url = config["url"]
+
+        username = config["username"]
         if username is None:
             raise AnsibleParserError(
                 "Could not retrieve ZPE Cloud username from plugin configuration or environment."
             )
 
-        password = self.get_option("password", None) or os.environ.get(
-            "ZPECLOUD_PASSWORD", None
-        )
+        password = config["password"]
         if password is None:
             raise AnsibleParserError(
                 "Could not retrieve ZPE Cloud password from plugin configuration or environment."
             )
 
-        organization = self.get_option("organization", None) or os.environ.get(
-            "ZPECLOUD_ORGANIZATION", None
-        )
+        organization = config["organization"]
 
         try:
             self._api_session = ZPECloudAPI(url)
@@ -642,13 +699,45 @@ class InventoryModule(BaseInventoryPlugin):
                     f"Failed to switch organization. Error: {err}."
                 )
 
-    def parse(self, inventory, loader, path, cache=True):
-        super(InventoryModule, self).parse(inventory, loader, path)
-        self._read_config_data(path)
+    def _get_cache_key(self, path: str, config: Dict[str, Optional[str]]) -> str:
+        """Cache key is scoped by ZPE Cloud account, as credentials can be switched by environment variables
+        while using the same inventory file."""
+        account = f"{config['url']}|{config['username']}|{config['organization']}"
+        return f"{self.get_cache_key(path)}_{hashlib.sha256(account.encode()).hexdigest()}"
+
+    def _get_resources(self, path: str, cache: bool) -> Dict[str, ListDictError]:
+        """Get resources from inventory cache, or fetch them from ZPE Cloud."""
+        config = self._get_config()
+        cache_key = self._get_cache_key(path, config)
+        user_cache_setting = self.get_option("cache")
+        attempt_to_read_cache = user_cache_setting and cache
+        cache_needs_update = user_cache_setting and not cache
+
+        if attempt_to_read_cache:
+            try:
+                resources = self._cache[cache_key]
+                self.display.v("Using inventory from cache ...")
+                return resources
+            except KeyError:
+                cache_needs_update = True
 
         # get credentials from file and create an API session to ZPE Cloud
         self.display.v("Authenticating on ZPE Cloud ...")
-        self._create_api_session()
+        self._create_api_session(config)
+
+        # fetch groups, sites, devices, and custom fields from ZPE Cloud
+        self.display.v("Fetching groups, sites, Nodegrid devices, and custom fields from ZPE Cloud ...")
+        resources = self._fetch_resources()
+
+        # failures are not cached, then next execution will try to fetch all resources again
+        if cache_needs_update and not any(err for content, err in resources.values()):
+            self._cache[cache_key] = resources
+
+        return resources
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path)
+        self._read_config_data(path)
 
         # create default groups
         self.inventory.add_group(ZPECloudDefaultGroups.DEVICE_ENROLLED)
@@ -657,24 +746,27 @@ class InventoryModule(BaseInventoryPlugin):
         self.inventory.add_group(ZPECloudDefaultGroups.DEVICE_OFFLINE)
         self.inventory.add_group(ZPECloudDefaultGroups.DEVICE_FAILOVER)
 
+        resources = self._get_resources(path, cache)
+
         # create groups based on ZPE Cloud groups
-        self.display.v("Fetching groups from ZPE Cloud and creating Ansible groups ...")
-        zpecloud_groups = self._parse_groups()
+        self.display.v("Creating Ansible groups from ZPE Cloud groups ...")
+        zpecloud_groups = self._parse_groups(resources["groups"])
 
         # create groups based on ZPE Cloud sites
-        self.display.v("Fetching sites from ZPE Cloud and creating Ansible groups ...")
-        zpecloud_sites = self._parse_sites()
-
-        # fetch devices from ZPE Cloud and populate hosts
-        self.display.v(
-            "Fetching Nodegrid devices from ZPE Cloud and creating Ansible hosts ..."
+        self.display.v("Creating Ansible groups from ZPE Cloud sites ...")
+        zpecloud_sites = self._parse_sites(resources["sites"])
+
+        # populate hosts with Nodegrid devices
+        self.display.v("Creating Ansible hosts from Nodegrid devices ...")
+        zpecloud_devices = self._parse_devices(
+            resources["enrolled_devices"],
+            resources["available_devices"],
+            zpecloud_groups,
+            zpecloud_sites,
         )
-        zpecloud_devices = self._parse_devices(zpecloud_groups, zpecloud_sites)
 
         self._set_default_variables(zpecloud_devices)
 
-        # fetch custom fields from ZPE Cloud
-        self.display.v(
-            "Fetching custom fields devices from ZPE Cloud and creating Ansible variables ..."
-        )
-        self._parse_custom_fields(zpecloud_devices)
+        # create variables based on ZPE Cloud custom fields
+        self.display.v("Creating Ansible variables from ZPE Cloud custom fields ...")
+        self._parse_custom_fields(resources["custom_fields"], zpecloud_devices)
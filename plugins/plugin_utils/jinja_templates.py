@@ -9,17 +9,20 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+from functools import lru_cache
 from jinja2 import Environment, TemplateError
 from typing import Dict
 
 from ansible_collections.zpe.zpecloud.plugins.plugin_utils.types import StringError
+from ansible_collections.zpe.zpecloud.plugins.plugin_utils.utils import COMPRESSED_SUFFIXES
 
 
+# single substitution, then python string formatting is used instead of jinja
+# output matches jinja rendering, that strips the trailing newline from templates
 EXEC_COMMAND_TEMPLATE = """\
 #!/bin/bash
 
-{{ command }}
-
+{command}
 """
 
 PUT_FILE_TEMPLATE = """\
@@ -35,7 +38,7 @@ from typing import Optional
 
 filename = "{{ filename }}"
 out_path = "{{ out_path }}"
-compression_method = {{ compression_method }}
+compression_method = zipfile.ZIP_DEFLATED
 
 
 def decode_base64(data: bytes) -> Optional[bytes]:
@@ -81,9 +84,8 @@ if __name__ == "__main__":
     with open(out_path, "wb") as f:
         f.write(extracted_file)
 
-    uid = getpwnam("ansible").pw_uid
-    gid = getpwnam("ansible").pw_gid
-    os.chown(out_path, uid, gid)
+    ansible_user = getpwnam("ansible")
+    os.chown(out_path, ansible_user.pw_uid, ansible_user.pw_gid)
 
 """
 
@@ -92,6 +94,8 @@ FETCH_FILE_TEMPLATE = """\
 
 import base64
 import os
+import shutil
+import time
 import zipfile
 
 from io import BytesIO
@@ -99,14 +103,15 @@ from typing import Optional
 
 filename = "{{ filename }}"
 in_path = "{{ in_path }}"
-compression_method = {{ compression_method }}
 max_file_size = {{ max_file_size }}
+compressed_suffixes = {{ compressed_suffixes }}
 
 
-def encode_base64(data: bytes) -> Optional[bytes]:
-    enc_data = b""
+def encode_base64(data: bytes) -> Optional[str]:
+    enc_data = ""
     try:
-        enc_data = base64.b64encode(data)
+        # base64 output is ascii, then decoding does not need utf-8 validation
+        enc_data = base64.b64encode(data).decode("ascii")
 
     except Exception as err:
         print(f"Failed to encode data. Error: {err}.")
@@ -115,13 +120,25 @@ def encode_base64(data: bytes) -> Optional[bytes]:
     return enc_data
 
 
-def compress_file(data: bytes, filename: str) -> Optional[bytes]:
+def compress_file(in_path: str, filename: str) -> Optional[bytes]:
     zipped_str = b""
     mem_zip = BytesIO()
 
+    # files already compressed by their format are stored as is
+    compression = zipfile.ZIP_DEFLATED
+    if in_path.lower().endswith(compressed_suffixes):
+        compression = zipfile.ZIP_STORED
+
+    # entry is stamped with current time, because zip does not support timestamps before 1980,
+    # e.g. files from devices without a valid clock
+    zinfo = zipfile.ZipInfo(filename, time.localtime()[:6])
+    zinfo.compress_type = compression
+
     try:
-        with zipfile.ZipFile(mem_zip, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-            zf.writestr(filename, data)
+        # file is read, and compressed, in chunks instead of loading it fully in memory
+        with open(in_path, "rb") as f, zipfile.ZipFile(mem_zip, mode="w") as zf:
+            with zf.open(zinfo, mode="w") as dest:
+                shutil.copyfileobj(f, dest)
         zipped_str = mem_zip.getvalue()
     except Exception as err:
         print(f"Failed to compress file. Error: {err}.")
@@ -131,8 +148,6 @@ def compress_file(data: bytes, filename: str) -> Optional[bytes]:
 
 
 if __name__ == "__main__":
-    data = ""
-
     if not os.path.exists(in_path):
         print(f"File {in_path} does not exist.")
         exit(1)
@@ -142,16 +157,8 @@ if __name__ == "__main__":
         print(f"Size of file {in_path} is bigger than limit of {max_file_size} bytes.")
         exit(1)
 
-    try:
-        with open(in_path, "rb") as f:
-            data = f.read()
-
-    except Exception as err:
-        print(f"Failed to read file {in_path}. Error: {err}.")
-        exit(1)
-
     # zip original file
-    compressed_file = compress_file(data, filename)
+    compressed_file = compress_file(in_path, filename)
     if compressed_file is None:
         exit(1)
 
@@ -161,16 +168,24 @@ if __name__ == "__main__":
         exit(1)
 
     # return data that will be used by Ansible
-    print(encoded_file.decode("utf-8"))
+    print(encoded_file)
 
 """
 
 
+_JINJA_ENV = Environment(auto_reload=False)
+
+
+@lru_cache(maxsize=32)
+def _compile_template(template: str):
+    """Compile template source only once per process."""
+    return _JINJA_ENV.from_string(template)
+
+
 def _render_template(template: str, context: Dict) -> StringError:
     """Render specific template based on context dictionary."""
     try:
-        jinja_env = Environment()
-        jinja_template = jinja_env.from_string(template)
+        jinja_template = _compile_template(template)
         render_template = jinja_template.render(context)
         return render_template, None
     except TemplateError as err:
@@ -178,9 +193,8 @@ def _render_template(template: str, context: Dict) -> StringError:
 
 
 def render_exec_command(command: str) -> StringError:
-    """Use jinja to render bash script profile with commands generated by Ansible."""
-    context = {"command": command}
-    return _render_template(EXEC_COMMAND_TEMPLATE, context)
+    """Render bash script profile with commands generated by Ansible."""
+    return EXEC_COMMAND_TEMPLATE.format(command=command), None
 
 
 def render_put_file(out_path: str, file_content: str, filename: str) -> StringError:
@@ -189,7 +203,6 @@ def render_put_file(out_path: str, file_content: str, filename: str) -> StringEr
         "content": file_content,
         "out_path": out_path,
         "filename": filename,
-        "compression_method": 8,
     }
     return _render_template(PUT_FILE_TEMPLATE, context)
 
@@ -199,7 +212,7 @@ def render_fetch_file(in_path: str, filename: str, max_file_size: int) -> String
     context = {
         "in_path": in_path,
         "filename": filename,
-        "compression_method": 8,
         "max_file_size": max_file_size,
+        "compressed_suffixes": COMPRESSED_SUFFIXES,
     }
     return _render_template(FETCH_FILE_TEMPLATE, context)
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2024, ZPE Systems <zpesystems.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Make coding more python3-ish, this is required for contributions to Ansible
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+from typing import Any
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# orjson accepts both str and bytes, and is much faster to parse large responses from ZPE Cloud
+loads = orjson.loads if HAS_ORJSON else json.loads
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize object to JSON encoded bytes, using orjson when available."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
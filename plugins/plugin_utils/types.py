@@ -16,3 +16,4 @@ BytesError = Union[Tuple[bytes, None], Tuple[Any, str]]
 BooleanError = Union[Tuple[bool, None], Tuple[bool, str]]
 DictError = Union[Tuple[Dict, None], Tuple[None, str]]
 ListDictError = Union[Tuple[List[Dict], None], Tuple[None, str]]
+JSONError = Union[Tuple[Any, None], Tuple[Any, str]]
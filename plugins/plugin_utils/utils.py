@@ -10,8 +10,25 @@ from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
 import base64
+import binascii
+import os
+import shutil
+import stat
+import struct
+import tempfile
+import time
 import zipfile
+import zlib
 from io import BytesIO
+from typing import Optional
+
+try:
+    # SIMD accelerated base64 codec, used when available
+    import pybase64
+
+    HAS_PYBASE64 = True
+except ImportError:
+    HAS_PYBASE64 = False
 
 from ansible_collections.zpe.zpecloud.plugins.plugin_utils.types import (
     BooleanError,
@@ -38,10 +55,71 @@ def write_file(out_path: str, data: str) -> BooleanError:
         return None, f"Failed to write file {out_path}. Error: {err}"
 
 
+def make_private_dir(path: str) -> BooleanError:
+    """Create directory that can only be accessed by the current user.
+    Existing directory is rejected if it is owned by other user, or other users can access it."""
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        dir_stat = os.lstat(path)
+    except Exception as err:
+        return None, f"Failed to create directory {path}. Error: {err}"
+
+    if not stat.S_ISDIR(dir_stat.st_mode) or dir_stat.st_uid != os.getuid() or stat.S_IMODE(dir_stat.st_mode) & 0o077:
+        return None, f"Directory {path} must be owned by the current user, and not accessible by other users"
+
+    return True, None
+
+
+def read_private_file(in_path: str, max_age: Optional[float] = None) -> BytesError:
+    """Read file created by write_private_file.
+    Symbolic links, files owned by other user, files with mode other than 0600, and files
+    modified more than max_age seconds ago, are rejected."""
+    try:
+        fd = os.open(in_path, os.O_RDONLY | os.O_NOFOLLOW)
+    except Exception as err:
+        return None, f"Failed to read file {in_path}. Error: {err}"
+
+    try:
+        with os.fdopen(fd, "rb") as f:
+            file_stat = os.fstat(f.fileno())
+            if file_stat.st_uid != os.getuid() or stat.S_IMODE(file_stat.st_mode) != 0o600:
+                return None, f"File {in_path} must be owned by the current user, and only accessible by it"
+
+            if max_age is not None and time.time() - file_stat.st_mtime > max_age:
+                return None, f"File {in_path} is expired"
+
+            return f.read(), None
+    except Exception as err:
+        return None, f"Failed to read file {in_path}. Error: {err}"
+
+
+def write_private_file(out_path: str, data: bytes) -> BooleanError:
+    """Write file that can only be read, and written, by the current user.
+    Temporary file is created exclusively with mode 0600, then content is replaced atomically,
+    and concurrent readers never see a partial file."""
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(out_path), prefix=f"{os.path.basename(out_path)}.", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, out_path)
+        return True, None
+    except Exception as err:
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return None, f"Failed to write file {out_path}. Error: {err}"
+
+
 def encode_base64(data: bytes) -> BytesError:
     enc_data = b""
     try:
-        enc_data = base64.b64encode(data)
+        if HAS_PYBASE64:
+            enc_data = pybase64.b64encode(data)
+        else:
+            enc_data = binascii.b2a_base64(data, newline=False)
 
     except Exception as err:
         return None, f"Failed to encode data. Error: {err}"
@@ -52,7 +130,10 @@ def encode_base64(data: bytes) -> BytesError:
 def decode_base64(data: bytes) -> BytesError:
     dec_data = b""
     try:
-        dec_data = base64.b64decode(data)
+        if HAS_PYBASE64:
+            dec_data = pybase64.b64decode(data)
+        else:
+            dec_data = base64.b64decode(data)
     except Exception as err:
         return None, f"Failed to decode data. Error: {err}"
 
@@ -67,30 +148,154 @@ def compress_file(data: str, filename: str) -> BytesError:
             zf.writestr(filename, data)
         zipped_str = mem_zip.getvalue()
     except Exception as err:
-        return None, f"Failed do compress data. Error: {err}"
+        return None, f"Failed to compress data. Error: {err}"
 
     return zipped_str, None
 
 
+class _Base64Writer:
+    """File-like object that encodes data to base64 while it is written."""
+
+    def __init__(self) -> None:
+        self._pending = b""  # bytes that are not aligned to base64 blocks of 3 bytes
+        self._encoded = bytearray()
+
+    def write(self, data: bytes) -> int:
+        size = len(data)
+        if self._pending:
+            data = self._pending + bytes(data)
+
+        data = memoryview(data)
+        aligned_size = len(data) - len(data) % 3
+        self._encoded += binascii.b2a_base64(data[:aligned_size], newline=False)
+        self._pending = bytes(data[aligned_size:])
+        return size
+
+    def flush(self) -> None:
+        pass
+
+    def getvalue(self) -> bytes:
+        return bytes(self._encoded + binascii.b2a_base64(self._pending, newline=False))
+
+
+# files already compressed by their format do not shrink with deflate, then they are stored as is
+COMPRESSED_SUFFIXES = (
+    ".7z",
+    ".bz2",
+    ".gz",
+    ".jpeg",
+    ".jpg",
+    ".png",
+    ".tgz",
+    ".xz",
+    ".zip",
+    ".zst",
+)
+
+
+def zip_compression_method(path: str) -> int:
+    """Choose zip compression method for file based on its extension."""
+    if path.lower().endswith(COMPRESSED_SUFFIXES):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def compress_encode_file(in_path: str, filename: str) -> BytesError:
+    """Compress file from disk inside zip file, and encode the zip file to base64.
+    File is read in chunks, and compressed data is encoded while it is generated,
+    then the file content is never fully loaded in memory."""
+    b64_writer = _Base64Writer()
+    # entry is stamped with current time, because zip does not support timestamps before 1980
+    zinfo = zipfile.ZipInfo(filename, time.localtime()[:6])
+    zinfo.compress_type = zip_compression_method(in_path)
+    try:
+        with open(in_path, "rb") as f, zipfile.ZipFile(b64_writer, mode="w") as zf:
+            with zf.open(zinfo, mode="w") as dest:
+                shutil.copyfileobj(f, dest)
+    except Exception as err:
+        return None, f"Failed to compress data. Error: {err}"
+
+    return b64_writer.getvalue(), None
+
+
+_ZIP_LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+_ZIP_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+# encrypted, or sizes stored after data
+_ZIP_UNSUPPORTED_FLAGS = 0x01 | 0x08
+_ZIP64_SIZE = 0xFFFFFFFF
+
+
+def _extract_deflated_member(data: bytes, filename: str) -> Optional[bytes]:
+    """Decompress first member of zip file directly from its local header, without zipfile.
+    Files fetched from Nodegrid devices are zip files with a single deflated, or stored, member.
+    return: Content of member, or None when the zip file must be extracted by zipfile."""
+    if len(data) < _ZIP_LOCAL_HEADER.size:
+        return None
+
+    (
+        signature,
+        _version,
+        flags,
+        method,
+        _mod_time,
+        _mod_date,
+        crc,
+        compressed_size,
+        size,
+        name_size,
+        extra_size,
+    ) = _ZIP_LOCAL_HEADER.unpack_from(data)
+    if (
+        signature != _ZIP_LOCAL_HEADER_SIGNATURE
+        or method not in (zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED)
+        or flags & _ZIP_UNSUPPORTED_FLAGS
+        or compressed_size == _ZIP64_SIZE
+    ):
+        return None
+
+    view = memoryview(data)
+    name_start = _ZIP_LOCAL_HEADER.size
+    if view[name_start:name_start + name_size] != filename.encode():
+        return None
+
+    data_start = name_start + name_size + extra_size
+    compressed = view[data_start:data_start + compressed_size]
+    if len(compressed) != compressed_size:
+        return None
+
+    if method == zipfile.ZIP_STORED:
+        content = bytes(compressed)
+    else:
+        # negative window bits for raw deflate stream, without zlib header
+        content = zlib.decompress(compressed, -zlib.MAX_WBITS)
+    if len(content) != size or zlib.crc32(content) != crc:
+        return None
+
+    return content
+
+
 def extract_file(data: str, filename: str) -> BytesError:
-    mem_zip = BytesIO(data)
     mem_file = b""
     try:
-        with zipfile.ZipFile(mem_zip, mode="r", compression=zipfile.ZIP_DEFLATED) as zf:
-            with zf.open(filename) as myfile:
-                mem_file = myfile.read()
+        mem_file = _extract_deflated_member(data, filename)
+        if mem_file is None:
+            with zipfile.ZipFile(BytesIO(data), mode="r", compression=zipfile.ZIP_DEFLATED) as zf:
+                with zf.open(filename) as myfile:
+                    mem_file = myfile.read()
     except Exception as err:
         return None, f"Failed to extract data. Error: {err}"
 
     return mem_file, None
 
 
-def exponential_backoff_delay(attempt: int, max_delay: int) -> int:
+def exponential_backoff_delay(attempt: int, max_delay: float, base_delay: float = 1) -> float:
     """Generate delay period based on exponential backoff algorithm
     attempt: Current amount of attempts.
     max_delay: Max delay time in seconds.
+    base_delay: Delay time in seconds for the first attempt.
     return: Delay based on number of attempts, or max delay."""
     if attempt <= 0:
-        return 1
+        return min(base_delay, max_delay)
 
-    return min(2 ** (attempt - 1), max_delay)
+    # exponent is clamped, then runaway attempts do not overflow float conversion
+    return min(base_delay * (1 << min(attempt - 1, 62)), max_delay)
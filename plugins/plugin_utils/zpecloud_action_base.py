@@ -9,15 +9,9 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
-import os
-
-from ansible.errors import AnsibleActionFail
+from ansible.errors import AnsibleActionFail, AnsibleConnectionFailure
 from ansible.plugins.action import ActionBase
 
-from ansible_collections.zpe.zpecloud.plugins.plugin_utils.zpecloud_api import (
-    ZPECloudAPI,
-)
-
 
 class ZPECloudActionBase(ActionBase):
     """Base action module used for Ansible actions that interacts with ZPE Cloud API."""
@@ -31,51 +25,17 @@ class ZPECloudActionBase(ActionBase):
         self.host_serial_number = None
 
     def _create_api_session(self) -> None:
-        """Get credential information from user and create an authenticate session to ZPE Cloud."""
+        """Get authenticated session to ZPE Cloud from the connection plugin.
+        Connection reuses sessions stored on disk by previous tasks, then actions only log in when there is
+        no valid session for the same credentials."""
         connection = self._connection
         if connection is None:
             raise AnsibleActionFail("Connection options are not defined.")
 
-        url = connection.get_option("url", None) or os.environ.get("ZPECLOUD_URL", None)
-
-        # default for url
-        if url is None:
-            url = "https://zpecloud.com"
-
-        username = connection.get_option("username", None) or os.environ.get(
-            "ZPECLOUD_USERNAME", None
-        )
-        if username is None:
-            raise AnsibleActionFail(
-                "Could not retrieve ZPE Cloud username from plugin configuration or environment."
-            )
-
-        password = connection.get_option("password", None) or os.environ.get(
-            "ZPECLOUD_PASSWORD", None
-        )
-        if password is None:
-            raise AnsibleActionFail(
-                "Could not retrieve ZPE Cloud password from plugin configuration or environment."
-            )
-
-        organization = connection.get_option("organization", None) or os.environ.get(
-            "ZPECLOUD_ORGANIZATION", None
-        )
-
-        try:
-            self._api_session = ZPECloudAPI(url)
-        except Exception as err:
-            raise AnsibleActionFail(
-                f"Failed to authenticate on ZPE Cloud. Error: {err}."
-            )
-
-        result, err = self._api_session.authenticate_with_password(username, password)
-        if err:
-            raise AnsibleActionFail(
-                f"Failed to authenticate on ZPE Cloud. Error: {err}."
-            )
+        if connection._api_session is None:
+            try:
+                connection._create_api_session()
+            except AnsibleConnectionFailure as err:
+                raise AnsibleActionFail(err.message)
 
-        if organization:
-            result, err = self._api_session.change_organization(organization)
-            if err:
-                raise AnsibleActionFail(f"Failed to switch organization. Error: {err}.")
+        self._api_session = connection._api_session
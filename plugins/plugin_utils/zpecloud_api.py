@@ -9,26 +9,37 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
-import json
-from typing import Dict, Tuple, List, Optional
+import gzip
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple, Optional
 from urllib.parse import urlparse
 from datetime import datetime
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 
     HAS_REQUESTS = True
 except ImportError:
     HAS_REQUESTS = False
 
+from ansible_collections.zpe.zpecloud.plugins.plugin_utils import serialization
 from ansible_collections.zpe.zpecloud.plugins.plugin_utils.types import (
     StringError,
+    BytesError,
     BooleanError,
     DictError,
+    JSONError,
     ListDictError,
 )
 
 
+# Probe on raw job content to find jobs that finished, without parsing the whole response.
+JOB_TERMINAL_STATUS_RE = re.compile(r'"status"\s*:\s*"(?:Successful|Failed|Cancelled|Timeout)"')
+
+
 class MissingDependencyError(Exception):
     """System does not have necessary dependency."""
 
@@ -37,7 +48,27 @@ class MissingDependencyError(Exception):
 
 class ZPECloudAPI:
     timeout = 100
-    query_limit = 50
+    # page size requested from the server, which may enforce a smaller one
+    query_limit = 500
+
+    # max amount of page requests executed concurrently by paginated listings
+    max_workers = 8
+
+    # connections are kept alive and reused by all requests from the session
+    # inventory fetches 5 paginated listings concurrently, then pool must hold all their page requests
+    pool_connections = 4
+    pool_maxsize = 5 * max_workers
+
+    # retry idempotent requests that failed due server or gateway errors
+    max_retries = 3
+    retry_backoff_factor = 0.2
+    retry_status_forcelist = (429, 500, 502, 503, 504)
+
+    # uploads smaller than this are not worth compressing
+    compress_min_size = 1024
+
+    # chunk size used to stream downloaded files
+    download_chunk_size = 64 * 1024
 
     SCHEDULE_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
 
@@ -46,14 +77,41 @@ class ZPECloudAPI:
             raise MissingDependencyError("Please install python requests library.")
 
         # urlparse struggles to define netloc and path without scheme
-        if "http://" not in url and "https://" not in url:
+        if not url.startswith(("http://", "https://")):
             url = f"https://{url}"
 
-        url_parts = urlparse(url)
-        netloc = url_parts.netloc.replace("www.", "")
+        netloc = urlparse(url).netloc
+        if netloc.startswith("www."):
+            netloc = netloc[4:]
 
         self._url = f"https://api.{netloc}"
+        self._organization_name = None
+        # organization name -> company ID, from last company list response
+        self._companies_by_name = None
+        # job ID -> (ETag, content) from last job details response
+        self._job_details = {}
+        # set once ZPE Cloud rejects the session credentials, e.g. session expired
+        self.unauthorized = False
         self._zpe_cloud_session = requests.Session()
+        self._zpe_cloud_session.hooks["response"].append(self._check_authorization)
+
+        retries = Retry(
+            total=self.max_retries,
+            backoff_factor=self.retry_backoff_factor,
+            status_forcelist=self.retry_status_forcelist,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retries,
+        )
+        self._zpe_cloud_session.mount("https://", adapter)
+
+    def _check_authorization(self, r: "requests.Response", *args, **kwargs) -> None:
+        # files are downloaded from storage hosts, which must not invalidate ZPE Cloud session
+        if r.status_code == 401 and r.url.startswith(f"{self._url}/"):
+            self.unauthorized = True
 
     def _post(self, url: str, data: Dict) -> StringError:
         r = self._zpe_cloud_session.post(url=url, data=data, timeout=self.timeout)
@@ -63,14 +121,23 @@ class ZPECloudAPI:
         else:
             return "", r.reason
 
-    def _get(self, url: str) -> StringError:
-        r = self._zpe_cloud_session.get(url=url, timeout=self.timeout)
+    def _get(self, url: str, params: Optional[Dict] = None) -> StringError:
+        r = self._zpe_cloud_session.get(url=url, params=params, timeout=self.timeout)
 
         if r.status_code == 200:
             return r.text, None
         else:
             return "", r.reason
 
+    def _get_json(self, url: str, params: Optional[Dict] = None) -> JSONError:
+        """Get JSON content from URL. Body is parsed from bytes, without decoding it to text first."""
+        r = self._zpe_cloud_session.get(url=url, params=params, timeout=self.timeout)
+
+        if r.status_code == 200:
+            return serialization.loads(r.content), None
+        else:
+            return None, r.reason
+
     def _delete(self, url: str) -> StringError:
         r = self._zpe_cloud_session.delete(url=url, timeout=self.timeout)
 
@@ -79,22 +146,73 @@ class ZPECloudAPI:
         else:
             return "", r.reason
 
-    def _upload_file(self, url: str, files: Tuple) -> StringError:
-        r = self._zpe_cloud_session.post(url=url, files=files, timeout=self.timeout)
+    def _upload_file(self, url: str, files: Tuple, compress: bool = False) -> StringError:
+        if not compress:
+            r = self._zpe_cloud_session.post(url=url, files=files, timeout=self.timeout)
+        else:
+            request = self._zpe_cloud_session.prepare_request(requests.Request("POST", url=url, files=files))
+            if len(request.body) >= self.compress_min_size:
+                request.body = gzip.compress(request.body)
+                request.headers["Content-Encoding"] = "gzip"
+                request.headers["Content-Length"] = str(len(request.body))
+
+            settings = self._zpe_cloud_session.merge_environment_settings(request.url, {}, None, None, None)
+            r = self._zpe_cloud_session.send(request, timeout=self.timeout, **settings)
 
         if r.status_code == 201:
             return r.text, None
         else:
             return "", r.reason
 
+    def download_file(self, url: str) -> BytesError:
+        """Download file from URL, e.g. output file from jobs, using connections from the session pool."""
+        with self._zpe_cloud_session.get(url=url, timeout=self.timeout, stream=True) as r:
+            if r.status_code != 200:
+                return None, r.reason
+
+            content = bytearray()
+            for chunk in r.iter_content(chunk_size=self.download_chunk_size):
+                content.extend(chunk)
+
+        return bytes(content), None
+
     def authenticate_with_password(self, username: str, password: str) -> BooleanError:
         payload = {"email": username, "password": password}
         content, err = self._post(url=f"{self._url}/user/auth", data=payload)
         if err:
             return False, err
 
-        response = json.loads(content)
+        response = serialization.loads(content)
         self._organization_name = response.get("company", {}).get("business_name", None)
+        self.unauthorized = False
+
+        return True, None
+
+    def export_session(self) -> Dict:
+        """Export authentication state from session, so it can be restored later without a new login."""
+        cookies = [
+            {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path}
+            for c in self._zpe_cloud_session.cookies
+        ]
+        return {"cookies": cookies, "organization_name": self._organization_name}
+
+    def import_session(self, session_state: Dict) -> BooleanError:
+        """Restore authentication state exported from other session, and check if it is still valid."""
+        try:
+            for c in session_state.get("cookies", []):
+                self._zpe_cloud_session.cookies.set(
+                    c["name"], c["value"], domain=c["domain"], path=c["path"]
+                )
+        except (AttributeError, KeyError, TypeError) as err:
+            self._zpe_cloud_session.cookies.clear()
+            return False, f"Invalid session state. Error: {err}"
+
+        err = self._get(url=f"{self._url}/account/company")[1]
+        if err:
+            self._zpe_cloud_session.cookies.clear()
+            return False, err
+
+        self._organization_name = session_state.get("organization_name", None)
 
         return True, None
 
@@ -102,19 +220,17 @@ class ZPECloudAPI:
         if self._organization_name == organization_name:
             return True, None
 
-        content, err = self._get(url=f"{self._url}/account/company")
-        if err:
-            return False, err
-
-        self._company_id = None
-        companies = json.loads(content)
-        for company in companies:
-            name = company.get("business_name", None)
+        if self._companies_by_name is None or organization_name not in self._companies_by_name:
+            companies, err = self._get_json(url=f"{self._url}/account/company")
+            if err:
+                self._companies_by_name = None
+                return False, err
 
-            if name == organization_name:
-                self._company_id = company.get("id", None)
-                break
+            self._companies_by_name = {}
+            for company in companies:
+                self._companies_by_name.setdefault(company.get("business_name", None), company.get("id", None))
 
+        self._company_id = self._companies_by_name.get(organization_name, None)
         if self._company_id is None:
             return (
                 False,
@@ -125,6 +241,7 @@ class ZPECloudAPI:
             url=f"{self._url}/user/auth/{self._company_id}", data={}
         )
         if err:
+            self._companies_by_name = None
             return False, err
 
         self._organization_name = organization_name
@@ -138,120 +255,76 @@ class ZPECloudAPI:
 
         return True, None
 
-    def _get_devices(self, enrolled: bool = True) -> ListDictError:
-        if enrolled:
-            enroll_param = "&enrolled=1"
-        else:
-            enroll_param = "&enrolled=0"
-
-        devices = []
-        while True:
-            offset_url = f"{self._url}/device?{enroll_param}&offset={len(devices)}&limit={self.query_limit}"
-            content, err = self._get(url=offset_url)
-            if err:
-                return None, err
-
-            content = json.loads(content)
-            device_count = content.get("count", None)
-            if device_count is None:
-                return None, "Failed to retrieve device count."
-
-            device_list = content.get("list", None)
-            if device_list is None:
-                return None, "Failed to retrieve device list."
+    def _get_page(self, url: str, params: Dict, resource: str) -> DictError:
+        content, err = self._get_json(url=url, params=params)
+        if err:
+            return None, err
 
-            devices += device_list
-            if len(devices) >= device_count:
-                break
+        if content.get("count", None) is None:
+            return None, f"Failed to retrieve {resource} count."
 
-        return devices, None
+        if content.get("list", None) is None:
+            return None, f"Failed to retrieve {resource} list."
 
-    def get_available_devices(self) -> ListDictError:
-        return self._get_devices(enrolled=False)
+        return content, None
 
-    def get_enrolled_devices(self) -> ListDictError:
-        return self._get_devices(enrolled=True)
+    def _paginate(self, path: str, resource: str, params: Optional[Dict] = None) -> ListDictError:
+        """Fetch all items from paginated endpoint. First page reveals the amount of items,
+        then remaining pages are fetched concurrently."""
+        url = f"{self._url}/{path}"
+        params = params or {}
 
-    def get_groups(self) -> ListDictError:
-        groups = []
-        while True:
-            offset_url = (
-                f"{self._url}/group?offset={len(groups)}&limit={self.query_limit}"
-            )
-            content, err = self._get(url=offset_url)
-            if err:
-                return None, err
-
-            content = json.loads(content)
-            group_count = content.get("count", None)
-            if group_count is None:
-                return None, "Failed to retrieve group count."
+        def get_page(offset: int) -> DictError:
+            return self._get_page(url, dict(params, offset=offset, limit=self.query_limit), resource)
 
-            group_list = content.get("list", None)
-            if group_list is None:
-                return None, "Failed to retrieve group list."
+        content, err = get_page(0)
+        if err:
+            return None, err
 
-            groups += group_list
-            if len(groups) >= group_count:
-                break
+        items = content["list"]
+        item_count = content["count"]
+        # server may enforce a page size smaller than the requested limit
+        page_size = len(items)
+        if page_size == 0 or page_size >= item_count:
+            return items, None
 
-        return groups, None
+        offsets = range(page_size, item_count, page_size)
+        with ThreadPoolExecutor(max_workers=min(len(offsets), self.max_workers)) as executor:
+            pages = list(executor.map(get_page, offsets))
 
-    def get_sites(self) -> ListDictError:
-        sites = []
-        while True:
-            offset_url = (
-                f"{self._url}/site?offset={len(sites)}&limit={self.query_limit}"
-            )
-            content, err = self._get(url=offset_url)
+        for content, err in pages:
             if err:
                 return None, err
 
-            content = json.loads(content)
-            site_count = content.get("count", None)
-            if site_count is None:
-                return None, "Failed to retrieve site count."
-
-            site_list = content.get("list", None)
-            if site_list is None:
-                return None, "Failed to retrieve group list."
+            items.extend(content["list"])
 
-            sites += site_list
-            if len(sites) >= site_count:
-                break
+        return items, None
 
-        return sites, None
+    def _get_devices(self, enrolled: bool = True) -> ListDictError:
+        return self._paginate("device", "device", {"enrolled": int(enrolled)})
 
-    def get_custom_fields(self) -> ListDictError:
-        custom_fields = []
-        while True:
-            offset_url = f"{self._url}/template-custom-field?offset={len(custom_fields)}&limit={self.query_limit}"
-            content, err = self._get(url=offset_url)
-            if err:
-                return None, err
+    def get_available_devices(self) -> ListDictError:
+        return self._get_devices(enrolled=False)
 
-            content = json.loads(content)
-            cf_count = content.get("count", None)
-            if cf_count is None:
-                return None, "Failed to retrieve custom field count."
+    def get_enrolled_devices(self) -> ListDictError:
+        return self._get_devices(enrolled=True)
 
-            cf_list = content.get("list", None)
-            if cf_list is None:
-                return None, "Failed to retrieve custom field list."
+    def get_groups(self) -> ListDictError:
+        return self._paginate("group", "group")
 
-            custom_fields += cf_list
-            if len(custom_fields) >= cf_count:
-                break
+    def get_sites(self) -> ListDictError:
+        return self._paginate("site", "site")
 
-        return custom_fields, None
+    def get_custom_fields(self) -> ListDictError:
+        return self._paginate("template-custom-field", "custom field")
 
-    def create_profile(self, files: Tuple) -> DictError:
-        content, err = self._upload_file(url=f"{self._url}/profile", files=files)
+    def create_profile(self, files: Tuple, compress: bool = False) -> DictError:
+        content, err = self._upload_file(url=f"{self._url}/profile", files=files, compress=compress)
 
         if err:
             return None, err
 
-        content = json.loads(content)
+        content = serialization.loads(content)
 
         return content, None
 
@@ -280,22 +353,40 @@ class ZPECloudAPI:
         return content, None
 
     def get_job(self, job_id: str) -> StringError:
-        content, err = self._get(url=f"{self._url}/job/{job_id}/details?jobId={job_id}")
+        """Get job details. Repeated calls for the same job are conditional requests,
+        so content is only transferred when job changed. Finished jobs are not cached."""
+        headers = {}
+        cached = self._job_details.get(job_id)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+
+        r = self._zpe_cloud_session.get(
+            url=f"{self._url}/job/{job_id}/details",
+            params={"jobId": job_id},
+            headers=headers,
+            timeout=self.timeout,
+        )
 
-        if err:
-            return None, err
+        if r.status_code == 304 and cached:
+            return cached[1], None
 
-        return content, None
+        if r.status_code != 200:
+            return None, r.reason
 
-    def _search_devices(self, search: str, enrolled: bool = True) -> ListDictError:
-        """Search device list based on some param."""
-        if enrolled:
-            enroll_param = "&enrolled=1"
+        if JOB_TERMINAL_STATUS_RE.search(r.text):
+            # job is not polled anymore once finished
+            self._job_details.pop(job_id, None)
         else:
-            enroll_param = "&enrolled=0"
+            etag = r.headers.get("ETag")
+            if etag:
+                self._job_details[job_id] = (etag, r.text)
 
-        url = f"{self._url}/device?{enroll_param}&search={search}"
-        content, err = self._get(url=url)
+        return r.text, None
+
+    def _search_devices(self, search: str, enrolled: bool = True) -> DictError:
+        """Search device list based on some param."""
+        params = {"enrolled": int(enrolled), "search": search}
+        content, err = self._get_json(url=f"{self._url}/device", params=params)
         if err:
             return None, err
 
@@ -304,9 +395,8 @@ class ZPECloudAPI:
     def fetch_device_by_serial_number(self, serial_number: str) -> DictError:
         """Fetch Nodegrid device based on serial number."""
 
-        def process_response(serial_number: str, content: List[Dict]) -> Optional[str]:
+        def process_response(serial_number: str, content: Dict) -> Optional[Dict]:
             """Check if serial number matches with some device from content list."""
-            content = json.loads(content)
             device_list = content.get("list", None)
             if device_list is None:
                 return None
@@ -339,29 +429,7 @@ class ZPECloudAPI:
         return None, f"Serial number {serial_number} not found"
 
     def get_available_os_version(self) -> ListDictError:
-        os_version = []
-        while True:
-            offset_url = (
-                f"{self._url}/release?offset={len(os_version)}&limit={self.query_limit}"
-            )
-            content, err = self._get(url=offset_url)
-            if err:
-                return None, err
-
-            content = json.loads(content)
-            os_count = content.get("count", None)
-            if os_count is None:
-                return None, "Failed to retrieve Nodegrid versions count."
-
-            os_list = content.get("list", None)
-            if os_list is None:
-                return None, "Failed to retrieve Nodegrid versions list."
-
-            os_version += os_list
-            if len(os_version) >= os_count:
-                break
-
-        return os_version, None
+        return self._paginate("release", "Nodegrid versions")
 
     def apply_software_upgrade(
         self, device_id: str, os_version_id: str, schedule: datetime
@@ -383,8 +451,8 @@ class ZPECloudAPI:
 
     def search_jobs(self, search: str) -> ListDictError:
         """Search jobs based on some param."""
-        url = f"{self._url}/job?q={search}&sort_by=-registered"
-        content, err = self._get(url=url)
+        params = {"q": search, "sort_by": "-registered"}
+        content, err = self._get(url=f"{self._url}/job", params=params)
         if err:
             return None, err
 
@@ -412,7 +480,6 @@ class ZPECloudAPI:
         if err:
             return False, err
 
-        content = json.loads(content)
         device_list = content.get("list", None)
 
         if device_list is None:
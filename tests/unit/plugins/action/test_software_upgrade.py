@@ -4,6 +4,7 @@
 import json
 import pytest
 import sys
+from datetime import datetime, timezone
 from unittest.mock import MagicMock, Mock
 from unittest.mock import patch
 
@@ -14,6 +15,7 @@ from ansible.errors import AnsibleError, AnsibleActionFail
 from ansible_collections.zpe.zpecloud.plugins.action.software_upgrade import (
     ActionModule,
 )
+from ansible_collections.zpe.zpecloud.plugins.plugin_utils.zpecloud_api import ZPECloudAPI
 
 if not sys.warnoptions:
     import warnings
@@ -142,6 +144,25 @@ def test_software_upgrade_is_upgrade(current, next, expected, action):
 """ Tests for _apply_software_upgrade """
 """ Tests for _get_software_upgrade_job_id """
 
+
+def test_software_upgrade_get_job_id_match_schedule(action):
+    """Job must be found by its UTC schedule."""
+    schedule = datetime(2024, 5, 1, 10, 30, 15, 123456, tzinfo=timezone.utc)
+    jobs = {
+        "list": [
+            {"id": "1", "schedule": "2024-05-01T10:30:15.000000Z"},
+            {"id": "2", "schedule": "2024-05-01T10:30:15.123456Z"},
+        ]
+    }
+    action._api_session.SCHEDULE_FORMAT = ZPECloudAPI.SCHEDULE_FORMAT
+    action._api_session.search_jobs.return_value = (json.dumps(jobs), None)
+
+    job_id, err = action._get_software_upgrade_job_id("12345", schedule)
+
+    assert job_id == "2"
+    assert err is None
+
+
 """ Tests for _get_software_upgrade_job_id """
 """ Tests for _wait_job_to_finish """
 
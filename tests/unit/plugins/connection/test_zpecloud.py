@@ -5,6 +5,7 @@ import json
 import os
 import pytest
 import sys
+import time
 from unittest.mock import MagicMock, Mock
 from unittest.mock import patch
 
@@ -22,14 +23,26 @@ if not sys.warnoptions:
 
 # Fixture for connection plugin
 @pytest.fixture(scope="module")
-def connection():
+def connection(tmp_path_factory):
     pc = PlayContext()
     conn = Connection(pc, "/dev/null")
     conn.get_option = MagicMock()
+    conn.session_cache_dir = str(tmp_path_factory.mktemp("session_cache"))
 
     return conn
 
 
+# Sessions and device IDs are shared between connections, then each test starts without cached values
+# Options not configured by the test fall back to plugin defaults
+@pytest.fixture(autouse=True)
+def clear_api_sessions(connection):
+    connection.get_option = MagicMock(return_value=None)
+    yield
+    for filename in os.listdir(connection.session_cache_dir):
+        if filename.startswith(".zpecloud-"):
+            os.remove(os.path.join(connection.session_cache_dir, filename))
+
+
 # Overwritten methods
 """ Tests for _connect """
 
@@ -50,6 +63,7 @@ def test_connect_empty_remote_address(connection):
 def test_connect_fetch_device_error(mock_zpecloud_api, connection):
     """Fetching device by serial number fails."""
     connection._api_session = mock_zpecloud_api
+    mock_zpecloud_api.unauthorized = False
     connection.host_serial_number = None
     connection.host_zpecloud_id = None
 
@@ -110,11 +124,154 @@ def test_connect_success(mock_zpecloud_api, connection):
     assert connection.host_zpecloud_id == host_id
 
 
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ZPECloudAPI")
+def test_connect_device_id_from_disk(mock_zpecloud_api, tmp_path):
+    """Device ID found by previous task must be reused without searching device on ZPE Cloud."""
+    remote_addr = "123456789"
+    host_id = "4321"
+
+    first_conn = Connection(PlayContext(), "/dev/null")
+    first_conn.session_cache_dir = str(tmp_path)
+    first_conn._api_session = mock_zpecloud_api
+    first_conn._api_session_key = ("https://zpecloud.com", "myuser@myemail.com", None)
+    first_conn._play_context = Mock(remote_addr=remote_addr)
+
+    mock_zpecloud_api.fetch_device_by_serial_number.return_value = ({"id": host_id}, None)
+    mock_zpecloud_api.can_apply_profile_on_device.return_value = (True, None)
+
+    first_conn._connect()
+    assert mock_zpecloud_api.fetch_device_by_serial_number.call_count == 1
+
+    # next task runs in other process, then it only finds device ID on disk
+    second_conn = Connection(PlayContext(), "/dev/null")
+    second_conn.session_cache_dir = str(tmp_path)
+    second_conn._api_session = mock_zpecloud_api
+    second_conn._api_session_key = first_conn._api_session_key
+    second_conn._play_context = Mock(remote_addr=remote_addr)
+
+    second_conn._connect()
+
+    assert second_conn.host_zpecloud_id == host_id
+    assert mock_zpecloud_api.fetch_device_by_serial_number.call_count == 1
+
+
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ZPECloudAPI")
+def test_connect_ignore_planted_device_id(mock_zpecloud_api, tmp_path):
+    """Device ID file that other users can write must be ignored, and device searched on ZPE Cloud."""
+    remote_addr = "123456789"
+    cache_dir = tmp_path / "zpecloud"
+
+    conn = Connection(PlayContext(), "/dev/null")
+    conn.session_cache_dir = str(cache_dir)
+    conn._api_session = mock_zpecloud_api
+    conn._api_session_key = ("https://zpecloud.com", "myuser@myemail.com", None)
+    conn._play_context = Mock(remote_addr=remote_addr)
+
+    cache_dir.mkdir(mode=0o700)
+    cache_path = conn._device_cache_path(remote_addr)
+    with open(cache_path, "w") as f:
+        json.dump({"id": "attacker-device", "timestamp": time.time()}, f)
+    os.chmod(cache_path, 0o644)
+
+    mock_zpecloud_api.fetch_device_by_serial_number.return_value = ({"id": "4321"}, None)
+    mock_zpecloud_api.can_apply_profile_on_device.return_value = (True, None)
+
+    conn._connect()
+
+    assert conn.host_zpecloud_id == "4321"
+    assert mock_zpecloud_api.fetch_device_by_serial_number.call_count == 1
+    assert os.stat(cache_path).st_mode & 0o777 == 0o600
+
+
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ZPECloudAPI")
+def test_connect_ignore_expired_device_id(mock_zpecloud_api, tmp_path):
+    """Device ID stored before session cache TTL must be ignored, and device searched on ZPE Cloud."""
+    remote_addr = "123456789"
+
+    conn = Connection(PlayContext(), "/dev/null")
+    conn.session_cache_dir = str(tmp_path)
+    conn._api_session = mock_zpecloud_api
+    conn._api_session_key = ("https://zpecloud.com", "myuser@myemail.com", None)
+    conn._play_context = Mock(remote_addr=remote_addr)
+
+    conn._save_device_cache(remote_addr, "old-device")
+    cache_path = conn._device_cache_path(remote_addr)
+    with open(cache_path, "w") as f:
+        json.dump({"id": "old-device", "timestamp": time.time() - conn.session_cache_ttl - 1}, f)
+
+    mock_zpecloud_api.fetch_device_by_serial_number.return_value = ({"id": "4321"}, None)
+    mock_zpecloud_api.can_apply_profile_on_device.return_value = (True, None)
+
+    conn._connect()
+
+    assert conn.host_zpecloud_id == "4321"
+    assert mock_zpecloud_api.fetch_device_by_serial_number.call_count == 1
+
+
+def test_device_cache_one_file_per_device(tmp_path):
+    """Device IDs of different hosts must be stored in different files, then parallel workers do not overwrite each other."""
+    conn = Connection(PlayContext(), "/dev/null")
+    conn.session_cache_dir = str(tmp_path)
+    conn._api_session_key = ("https://zpecloud.com", "myuser@myemail.com", None)
+
+    conn._save_device_cache("111", "device-1")
+    conn._save_device_cache("222", "device-2")
+
+    assert conn._device_cache_path("111") != conn._device_cache_path("222")
+    assert conn._load_device_cache("111") == "device-1"
+    assert conn._load_device_cache("222") == "device-2"
+
+
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ZPECloudAPI")
+def test_connect_device_not_ready_remove_device_id(mock_zpecloud_api, tmp_path):
+    """Device ID stored on disk must be removed if device is not ready, because its ID may have changed."""
+    remote_addr = "123456789"
+
+    conn = Connection(PlayContext(), "/dev/null")
+    conn.session_cache_dir = str(tmp_path)
+    conn._api_session = mock_zpecloud_api
+    mock_zpecloud_api.unauthorized = False
+    conn._api_session_key = ("https://zpecloud.com", "myuser@myemail.com", None)
+    conn._play_context = Mock(remote_addr=remote_addr)
+
+    conn._save_device_cache(remote_addr, "4321")
+    mock_zpecloud_api.can_apply_profile_on_device.return_value = (False, "some error")
+
+    with pytest.raises(AnsibleConnectionFailure):
+        conn._connect()
+
+    assert mock_zpecloud_api.fetch_device_by_serial_number.call_count == 0
+    assert not os.path.exists(conn._device_cache_path(remote_addr))
+    assert conn._load_device_cache(remote_addr) is None
+
+
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ZPECloudAPI")
+def test_apply_profile_fail_remove_device_id(mock_zpecloud_api, tmp_path):
+    """Device ID stored on disk must be removed if profile cannot be applied to it."""
+    remote_addr = "123456789"
+
+    conn = Connection(PlayContext(), "/dev/null")
+    conn.session_cache_dir = str(tmp_path)
+    conn._api_session = mock_zpecloud_api
+    mock_zpecloud_api.unauthorized = False
+    conn._api_session_key = ("https://zpecloud.com", "myuser@myemail.com", None)
+    conn.host_serial_number = remote_addr
+
+    conn._save_device_cache(remote_addr, "4321")
+    mock_zpecloud_api.apply_profile.return_value = (None, "some error")
+
+    with pytest.raises(AnsibleError):
+        conn._apply_profile("4321", "123")
+
+    assert conn._load_device_cache(remote_addr) is None
+
+
 @patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ZPECloudAPI")
 def test_connect_device_not_ready(mock_zpecloud_api, connection):
     """Connect raise error because device is not ready to receive profiles.
     Device is considered ready if enrolled, and with status online or failover."""
     connection._api_session = mock_zpecloud_api
+    mock_zpecloud_api.unauthorized = False
     connection.host_serial_number = None
     connection.host_zpecloud_id = None
 
@@ -211,15 +368,15 @@ def test_put_file_size_too_big(mock_os, mock_super_put_file, connection):
     mock_os.stat.assert_called_with(in_path.encode("utf-8"))
 
 
-@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.read_file")
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.compress_encode_file")
 @patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ConnectionBase.put_file")
 @patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.os")
-def test_put_file_fail_read_file(mock_os, mock_super_put_file, mock_read_file, connection):
-    """Try to send a file to host but failed to read file."""
+def test_put_file_fail_read_file(mock_os, mock_super_put_file, mock_compress_encode_file, connection):
+    """Try to send a file to host but failed to read, and compress file."""
     mock_super_put_file.return_value = None
     mock_os.path.exists.return_value = True
     mock_os.stat.return_value = Mock(st_size=connection.max_file_size_put_file)
-    mock_read_file.return_value = (None, "some error")
+    mock_compress_encode_file.return_value = (None, "some error")
 
     in_path = "/tmp/somepath"
     out_path = "/tmp/anotherpath"
@@ -229,18 +386,16 @@ def test_put_file_fail_read_file(mock_os, mock_super_put_file, mock_read_file, c
 
     mock_os.path.exists.assert_called_with(in_path.encode("utf-8"))
     mock_os.stat.assert_called_with(in_path.encode("utf-8"))
-    assert mock_read_file.call_count == 1
+    mock_compress_encode_file.assert_called_once_with(in_path, connection.filename_inside_zip)
 
 
-@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.read_file")
 @patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ConnectionBase.put_file")
 @patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.os")
-def test_put_file_fail_wait_job_finish(mock_os, mock_super_put_file, mock_read_file, connection):
+def test_put_file_fail_wait_job_finish(mock_os, mock_super_put_file, connection):
     """Try to send a file to host but failed to wait for job."""
     mock_super_put_file.return_value = None
     mock_os.path.exists.return_value = True
     mock_os.stat.return_value = Mock(st_size=connection.max_file_size_put_file)
-    mock_read_file.return_value = ("somefilecontent", None)
 
     connection._process_put_file = Mock()
     connection._wrapper_put_file = Mock()
@@ -248,6 +403,7 @@ def test_put_file_fail_wait_job_finish(mock_os, mock_super_put_file, mock_read_f
     connection._apply_profile = Mock()
     connection._wait_job_to_finish = Mock()
     connection._wait_job_to_finish.return_value = (None, "some error")
+    connection._delete_profile = Mock()
 
     in_path = "/tmp/somepath"
     out_path = "/tmp/anotherpath"
@@ -257,23 +413,22 @@ def test_put_file_fail_wait_job_finish(mock_os, mock_super_put_file, mock_read_f
 
     mock_os.path.exists.assert_called_with(in_path.encode("utf-8"))
     mock_os.stat.assert_called_with(in_path.encode("utf-8"))
-    assert mock_read_file.call_count == 1
     assert connection._process_put_file.call_count == 1
     assert connection._wrapper_put_file.call_count == 1
     assert connection._create_profile.call_count == 1
     assert connection._apply_profile.call_count == 1
     assert connection._wait_job_to_finish.call_count == 1
+    # profile with file content must not be kept on ZPE Cloud, even if job failed
+    assert connection._delete_profile.call_count == 1
 
 
-@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.read_file")
 @patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ConnectionBase.put_file")
 @patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.os")
-def test_put_file_success(mock_os, mock_super_put_file, mock_read_file, connection):
+def test_put_file_success(mock_os, mock_super_put_file, connection):
     """Succeed to send file to host."""
     mock_super_put_file.return_value = None
     mock_os.path.exists.return_value = True
     mock_os.stat.return_value = Mock(st_size=connection.max_file_size_put_file)
-    mock_read_file.return_value = ("somefilecontent", None)
 
     connection._process_put_file = Mock()
     connection._wrapper_put_file = Mock()
@@ -290,13 +445,12 @@ def test_put_file_success(mock_os, mock_super_put_file, mock_read_file, connecti
 
     mock_os.path.exists.assert_called_with(in_path.encode("utf-8"))
     mock_os.stat.assert_called_with(in_path.encode("utf-8"))
-    assert mock_read_file.call_count == 1
     assert connection._process_put_file.call_count == 1
     assert connection._wrapper_put_file.call_count == 1
     assert connection._create_profile.call_count == 1
     assert connection._apply_profile.call_count == 1
     assert connection._wait_job_to_finish.call_count == 1
-    assert connection._delete_profile.call_count == 1
+    connection._delete_profile.assert_called_once_with(connection._create_profile.return_value)
 
 
 """ Tests for put_file """
@@ -343,10 +497,52 @@ def test_reset_connection(connection):
     connection._connect.assert_called_once()
 
 
+def test_reset_connection_logout_shared_session(tmp_path):
+    """Reset must logout and discard session stored on disk for next tasks."""
+    conn = Connection(PlayContext(), "/dev/null")
+    conn.session_cache_dir = str(tmp_path)
+    conn._connect = MagicMock()
+
+    api_session = MagicMock()
+    api_session.logout.return_value = (True, None)
+    api_session.export_session.return_value = {"cookies": []}
+    conn._api_session = api_session
+    conn._api_session_key = ("https://zpecloud.com", "myuser@myemail.com", None)
+    conn._save_session_cache()
+    assert os.path.exists(conn._session_cache_path())
+
+    conn.reset()
+
+    api_session.logout.assert_called_once()
+    assert not os.path.exists(conn._session_cache_path())
+    assert conn._api_session is None
+    conn._connect.assert_called_once()
+
+
 """ Tests for reset """
 
 
 # Other methods
+""" Tests for _log_info """
+
+
+@pytest.mark.parametrize(
+    ("verbosity", "expected_v", "expected_vvv"),
+    [(0, 0, 0), (1, 1, 0), (3, 1, 1)],
+)
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.display")
+def test_log_info_verbosity(mock_display, connection, verbosity, expected_v, expected_vvv):
+    """Log messages must only be formatted if verbosity is high enough."""
+    mock_display.verbosity = verbosity
+
+    connection._log_info("some info")
+    connection._log_debug("some debug")
+
+    assert mock_display.v.call_count == expected_v
+    assert mock_display.vvv.call_count == expected_vvv
+
+
+""" Tests for _log_info """
 """ Tests for _create_api_session """
 
 
@@ -467,15 +663,234 @@ def test_create_api_session_switch_organization_fail(mock_zpe_cloud_api, connect
     mock_zpe_cloud_api.return_value.change_organization.assert_called_with(_options.get("organization"))
 
 
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ZPECloudAPI")
+def test_create_api_session_restore_session_from_disk(mock_zpe_cloud_api, connection):
+    """Session stored on disk by other process must be restored without a new login."""
+    session_state = {"cookies": [], "organization_name": "My organization"}
+    mock_zpe_cloud_api.return_value.authenticate_with_password.return_value = ("", None)
+    mock_zpe_cloud_api.return_value.change_organization.return_value = (True, None)
+    mock_zpe_cloud_api.return_value.export_session.return_value = session_state
+    mock_zpe_cloud_api.return_value.import_session.return_value = (True, None)
+
+    _options = {
+        "username": "myuser@myemail.com",
+        "password": "mysecurepassword",
+        "organization": "My organization",
+    }
+
+    def _get_option_side_effect(*args):
+        return _options.get(*args)
+
+    connection.get_option.side_effect = _get_option_side_effect
+
+    connection._create_api_session()
+    cache_path = connection._session_cache_path()
+    assert os.stat(cache_path).st_mode & 0o777 == 0o600
+
+    # next task runs in other process, where session is only available on disk
+    connection._api_session = None
+    connection._create_api_session()
+
+    assert mock_zpe_cloud_api.return_value.authenticate_with_password.call_count == 1
+    mock_zpe_cloud_api.return_value.import_session.assert_called_once_with(session_state)
+
+    os.remove(cache_path)
+
+
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ZPECloudAPI")
+def test_create_api_session_invalid_session_on_disk(mock_zpe_cloud_api, connection):
+    """Session stored on disk that is not valid anymore must be replaced by a new login."""
+    mock_zpe_cloud_api.return_value.authenticate_with_password.return_value = ("", None)
+    mock_zpe_cloud_api.return_value.change_organization.return_value = (True, None)
+    mock_zpe_cloud_api.return_value.export_session.return_value = {"cookies": []}
+    mock_zpe_cloud_api.return_value.import_session.return_value = (False, "Unauthorized")
+
+    _options = {
+        "username": "myuser@myemail.com",
+        "password": "mysecurepassword",
+        "organization": "My organization",
+    }
+
+    def _get_option_side_effect(*args):
+        return _options.get(*args)
+
+    connection.get_option.side_effect = _get_option_side_effect
+
+    connection._create_api_session()
+    connection._create_api_session()
+
+    assert mock_zpe_cloud_api.return_value.import_session.call_count == 1
+    assert mock_zpe_cloud_api.return_value.authenticate_with_password.call_count == 2
+
+    os.remove(connection._session_cache_path())
+
+
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ZPECloudAPI")
+def test_create_api_session_ignore_planted_session(mock_zpe_cloud_api, connection):
+    """Session file that other users can write must not be restored."""
+    mock_zpe_cloud_api.return_value.authenticate_with_password.return_value = ("", None)
+    mock_zpe_cloud_api.return_value.change_organization.return_value = (True, None)
+    mock_zpe_cloud_api.return_value.export_session.return_value = {"cookies": []}
+
+    _options = {
+        "username": "myuser@myemail.com",
+        "password": "mysecurepassword",
+        "organization": "My organization",
+    }
+
+    def _get_option_side_effect(*args):
+        return _options.get(*args)
+
+    connection.get_option.side_effect = _get_option_side_effect
+    connection._api_session_key = ("https://zpecloud.com", "myuser@myemail.com", "My organization")
+    cache_path = connection._session_cache_path()
+    with open(cache_path, "w") as f:
+        json.dump({"cookies": [{"name": "sessionid", "value": "planted", "domain": "", "path": "/"}]}, f)
+    os.chmod(cache_path, 0o666)
+
+    connection._create_api_session()
+
+    mock_zpe_cloud_api.return_value.import_session.assert_not_called()
+    assert mock_zpe_cloud_api.return_value.authenticate_with_password.call_count == 1
+    # planted file is replaced by a private one
+    assert os.stat(cache_path).st_mode & 0o777 == 0o600
+
+    os.remove(cache_path)
+
+
+def test_session_cache_dir_private_to_user():
+    """Sessions must be stored in a directory of the current user, instead of the shared temporary directory."""
+    conn = Connection(PlayContext(), "/dev/null")
+
+    assert conn.session_cache_dir == os.path.join(os.path.expanduser("~"), ".ansible", "zpecloud")
+
+
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ZPECloudAPI")
+def test_call_api_renew_rejected_session(mock_zpe_cloud_api, connection):
+    """Session rejected by ZPE Cloud must be discarded from memory and disk, and request retried with a new login."""
+    rejected_session = MagicMock(unauthorized=False)
+    rejected_session.authenticate_with_password.return_value = (True, None)
+    rejected_session.change_organization.return_value = (True, None)
+    rejected_session.export_session.return_value = {"cookies": [], "organization_name": "rejected"}
+    new_session = MagicMock(unauthorized=False)
+    new_session.authenticate_with_password.return_value = (True, None)
+    new_session.change_organization.return_value = (True, None)
+    new_session.export_session.return_value = {"cookies": [], "organization_name": "new"}
+    new_session.can_apply_profile_on_device.return_value = (True, None)
+    mock_zpe_cloud_api.side_effect = [rejected_session, new_session]
+
+    _options = {
+        "username": "myuser@myemail.com",
+        "password": "mysecurepassword",
+        "organization": "My organization",
+    }
+
+    def _get_option_side_effect(*args):
+        return _options.get(*args)
+
+    connection.get_option.side_effect = _get_option_side_effect
+
+    connection._create_api_session()
+    cache_path = connection._session_cache_path()
+
+    def _rejected_side_effect(*args):
+        rejected_session.unauthorized = True
+        return False, "Unauthorized"
+
+    rejected_session.can_apply_profile_on_device.side_effect = _rejected_side_effect
+
+    result = connection._call_api("can_apply_profile_on_device", "123456789")
+
+    assert result == (True, None)
+    new_session.authenticate_with_password.assert_called_once_with("myuser@myemail.com", "mysecurepassword")
+    new_session.can_apply_profile_on_device.assert_called_once_with("123456789")
+    assert connection._api_session == new_session
+    with open(cache_path) as f:
+        assert json.load(f)["organization_name"] == "new"
+
+    os.remove(cache_path)
+
+
+def test_call_api_keep_session_on_other_errors(connection):
+    """Errors that are not caused by a rejected session must not trigger a new login."""
+    connection._api_session = MagicMock(unauthorized=False)
+    connection._api_session.get_job.return_value = (None, "Gateway Timeout")
+    connection._create_api_session = MagicMock()
+
+    assert connection._call_api("get_job", "123") == (None, "Gateway Timeout")
+    assert connection._api_session.get_job.call_count == 1
+    connection._create_api_session.assert_not_called()
+
+    del connection._create_api_session
+
+
 """ Tests for _create_api_session """
 """ Tests for _wrapper_exec_command """
 
 """ Tests for _wrapper_exec_command """
 """ Tests for _create_profile """
 
+
+def test_create_profile_per_command(tmp_path):
+    """Each command must create its own profile, that is deleted once its job finishes."""
+    conn = Connection(PlayContext(), "/dev/null")
+    conn.session_cache_dir = str(tmp_path)
+    conn.get_option = MagicMock(return_value=False)
+    conn._api_session = MagicMock()
+    conn._api_session.create_profile.side_effect = [({"id": "123"}, None), ({"id": "456"}, None)]
+    conn._api_session.delete_profile.return_value = ("", None)
+    conn._apply_profile = MagicMock(return_value="789")
+    conn._wait_job_to_finish = MagicMock(return_value=("output", None))
+
+    assert conn._run_profile("echo foo") == ("output", None)
+    assert conn._run_profile("echo foo") == ("output", None)
+    assert conn._api_session.create_profile.call_count == 2
+    assert conn._api_session.create_profile.call_args.kwargs["compress"] is False
+    assert dict(conn._api_session.create_profile.call_args.args[0])["file"][1] == b"echo foo"
+
+    api_session = conn._api_session
+    conn.close()
+
+    assert [c.args[0] for c in api_session.delete_profile.call_args_list] == ["123", "456"]
+    assert conn._pending_deletions == []
+
+
+def test_run_profile_delete_profile_on_failure(tmp_path):
+    """Profile must be deleted even if it could not be applied to device."""
+    conn = Connection(PlayContext(), "/dev/null")
+    conn.session_cache_dir = str(tmp_path)
+    conn._create_profile = MagicMock(return_value="123")
+    conn._apply_profile = MagicMock(side_effect=AnsibleError("some error"))
+    conn._delete_profile = MagicMock()
+
+    with pytest.raises(AnsibleError):
+        conn._run_profile("echo foo")
+
+    conn._delete_profile.assert_called_once_with("123")
+
+
 """ Tests for _create_profile """
 """ Tests for _delete_profile """
 
+
+def test_delete_profile_awaited_on_close(tmp_path):
+    """Profiles are deleted in background, and close must wait for deletions."""
+    conn = Connection(PlayContext(), "/dev/null")
+    conn.session_cache_dir = str(tmp_path)
+    conn._api_session = MagicMock()
+    conn._api_session.delete_profile.side_effect = [("", None), (None, "some error")]
+
+    with patch.object(conn, "_log_warning") as mock_log_warning:
+        conn._delete_profile("123")
+        conn._delete_profile("456")
+        conn.close()
+
+    assert conn._api_session is None
+    assert conn._pending_deletions == []
+    assert mock_log_warning.call_count == 1
+    assert "456" in mock_log_warning.call_args.args[0]
+
+
 """ Tests for _delete_profile """
 """ Tests for _apply_profile """
 
@@ -492,12 +907,12 @@ def test_wait_job_to_finish_request_fail(mock_zpecloud_api, mock_time, mock_disp
     mock_zpecloud_api.get_job.return_value = (None, "Some error")
     mock_display_warning.return_value = None
 
-    mock_time.time.side_effect = [0, 0, 3601]
+    mock_time.monotonic.side_effect = [0, 0, 3601]
     mock_time.sleep.return_value = None
 
     content, err = connection._wait_job_to_finish("1234")
 
-    assert mock_time.time.call_count == 3
+    assert mock_time.monotonic.call_count == 3
     assert mock_display_warning.call_count == 1
     assert content == None
     assert err != None
@@ -532,9 +947,8 @@ def test_wait_job_to_finish_job_failure(mock_zpecloud_api, connection, job_statu
 
 
 @patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.time")
-@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.requests")
 @patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ZPECloudAPI")
-def test_wait_job_to_finish_job_failed(mock_zpecloud_api, mock_requests, mock_time, connection):
+def test_wait_job_to_finish_job_failed(mock_zpecloud_api, mock_time, connection):
     """
     Test wait job to finish with job failed status.
     In case of failure status with stdout available, the plugin will send stdout back to Ansible to decide if execution failed.
@@ -545,11 +959,11 @@ def test_wait_job_to_finish_job_failed(mock_zpecloud_api, mock_requests, mock_ti
 
     mock_zpecloud_api.get_job.return_value = (failed_status, None)
 
-    mock_time.time.return_value = 0
+    mock_time.monotonic.return_value = 0
     mock_time.sleep.return_value = None
 
     job_output = "somethinginbase64"
-    mock_requests.get.return_value = Mock(content=job_output)
+    mock_zpecloud_api.download_file.return_value = (job_output.encode("utf-8"), None)
 
     content, err = connection._wait_job_to_finish("12314")
 
@@ -557,13 +971,12 @@ def test_wait_job_to_finish_job_failed(mock_zpecloud_api, mock_requests, mock_ti
     assert content == job_output
 
     assert mock_zpecloud_api.get_job.call_count == 1
-    assert mock_requests.get.call_count == 1
+    mock_zpecloud_api.download_file.assert_called_once_with("someurl")
 
 
 @patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.time")
-@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.requests")
 @patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ZPECloudAPI")
-def test_wait_job_to_finish_job_success(mock_zpecloud_api, mock_requests, mock_time, connection):
+def test_wait_job_to_finish_job_success(mock_zpecloud_api, mock_time, connection):
     """Test wait job to finish with sequence of job status."""
     connection._api_session = mock_zpecloud_api
 
@@ -578,9 +991,9 @@ def test_wait_job_to_finish_job_success(mock_zpecloud_api, mock_requests, mock_t
     )
 
     job_output = "somethinginbase64"
-    mock_requests.get.return_value = Mock(content=job_output)
+    mock_zpecloud_api.download_file.return_value = (job_output.encode("utf-8"), None)
 
-    mock_time.time.return_value = 0
+    mock_time.monotonic.return_value = 0
     mock_time.sleep.return_value = None
 
     content, err = connection._wait_job_to_finish("12314")
@@ -589,8 +1002,8 @@ def test_wait_job_to_finish_job_success(mock_zpecloud_api, mock_requests, mock_t
     assert content == job_output
 
     assert mock_zpecloud_api.get_job.call_count == 7
-    assert mock_requests.get.call_count == 1
-    assert mock_time.time.call_count == 8
+    mock_zpecloud_api.download_file.assert_called_once_with("someurl")
+    assert mock_time.monotonic.call_count == 8
     assert mock_time.sleep.call_count == 6
 
 
@@ -605,7 +1018,7 @@ def test_wait_job_to_finish_job_ansible_timeout(mock_zpecloud_api, mock_time, co
     mock_zpecloud_api.get_job.return_value = (started_status, None)
 
     start_time = 1000  # seconds
-    mock_time.time.side_effect = [
+    mock_time.monotonic.side_effect = [
         start_time,  # start time
         start_time + 10,  # first iteration
         start_time + 1000,  # second iteration
@@ -620,10 +1033,60 @@ def test_wait_job_to_finish_job_ansible_timeout(mock_zpecloud_api, mock_time, co
     assert err == "Job timeout"
 
     assert mock_zpecloud_api.get_job.call_count == 3
-    assert mock_time.time.call_count == 5
+    assert mock_time.monotonic.call_count == 5
     assert mock_time.sleep.call_count == 3
 
 
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.time")
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ZPECloudAPI")
+def test_wait_job_to_finish_job_timeout_option(mock_zpecloud_api, mock_time, tmp_path):
+    """Job timeout configured by user must be used instead of default timeout."""
+    connection = Connection(PlayContext(), "/dev/null")
+    connection.session_cache_dir = str(tmp_path)
+    connection.get_option = MagicMock(side_effect=lambda option, *args: 10 if option == "job_timeout" else None)
+    connection._api_session = mock_zpecloud_api
+
+    started_status = json.dumps({"operation": {"status": "Started"}, "output_file": ""})
+    mock_zpecloud_api.get_job.return_value = (started_status, None)
+
+    mock_time.monotonic.side_effect = [0, 5, 11]
+    mock_time.sleep.return_value = None
+
+    content, err = connection._wait_job_to_finish("12314")
+
+    assert content is None
+    assert err == "Job timeout"
+    assert mock_zpecloud_api.get_job.call_count == 1
+
+
+@patch("ansible_collections.zpe.zpecloud.plugins.plugin_utils.serialization.loads", wraps=json.loads)
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.time")
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ZPECloudAPI")
+def test_wait_job_to_finish_skip_parsing_running_job(mock_zpecloud_api, mock_time, mock_json_loads, tmp_path):
+    """Responses for jobs that are still running should not be fully parsed."""
+    connection = Connection(PlayContext(), "/dev/null")
+    connection.session_cache_dir = str(tmp_path)
+    connection.get_option = MagicMock(return_value=None)
+    connection._api_session = mock_zpecloud_api
+
+    started_status = json.dumps({"operation": {"status": "Started"}, "output_file": ""})
+    successful_status = json.dumps({"operation": {"status": "Successful"}, "output_file": "someurl"})
+
+    mock_zpecloud_api.get_job = Mock()
+    mock_zpecloud_api.get_job.side_effect = [(started_status, None)] * 3 + [(successful_status, None)]
+    mock_zpecloud_api.download_file.return_value = (b"output", None)
+
+    mock_time.monotonic.return_value = 0
+    mock_time.sleep.return_value = None
+
+    content, err = connection._wait_job_to_finish("12314")
+
+    assert err is None
+    assert content == "output"
+    assert mock_zpecloud_api.get_job.call_count == 4
+    assert mock_json_loads.call_count == 1
+
+
 """ Tests for _wait_job_to_finish """
 """ Tests for _process_put_file """
 
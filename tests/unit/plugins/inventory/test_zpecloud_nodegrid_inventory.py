@@ -8,10 +8,18 @@ from unittest.mock import MagicMock
 from unittest.mock import patch
 
 from ansible.errors import AnsibleParserError
+from ansible.inventory.data import InventoryData
 
 from ansible_collections.zpe.zpecloud.plugins.inventory.zpecloud_nodegrid_inventory import (
     InventoryModule,
+    ZPECloudDefaultGroups,
+    ZPECloudMissingBodyInfoError,
+    ZPECustomFields,
+    name_sanitization,
+    ZPECloudGroup,
+    ZPECloudSite,
 )
+from ansible_collections.zpe.zpecloud.plugins.plugin_utils.zpecloud_api import ZPECloudAPI
 
 if not sys.warnoptions:
     import warnings
@@ -189,3 +197,339 @@ def test_create_api_session_switch_organization_fail(mock_zpe_cloud_api, invento
 
 
 """ Tests for _create_api_session """
+""" Tests for _fetch_resources """
+
+
+def test_fetch_resources(inventory):
+    """All resources must be fetched, and responses indexed by resource name."""
+    inventory._api_session = MagicMock()
+    inventory._api_session.get_groups.return_value = ([{"id": "1", "name": "group"}], None)
+    inventory._api_session.get_sites.return_value = ([{"id": "2", "name": "site"}], None)
+    inventory._api_session.get_enrolled_devices.return_value = ([{"id": "3"}], None)
+    inventory._api_session.get_available_devices.return_value = ([], None)
+    inventory._api_session.get_custom_fields.return_value = (None, "Failure")
+
+    resources = inventory._fetch_resources()
+
+    assert resources == {
+        "groups": ([{"id": "1", "name": "group"}], None),
+        "sites": ([{"id": "2", "name": "site"}], None),
+        "enrolled_devices": ([{"id": "3"}], None),
+        "available_devices": ([], None),
+        "custom_fields": (None, "Failure"),
+    }
+
+
+def test_fetch_resources_fit_connection_pool(inventory):
+    """Page requests of all resources fetched concurrently must fit in session connection pool."""
+    inventory._api_session = MagicMock()
+    for name in ("get_groups", "get_sites", "get_enrolled_devices", "get_available_devices", "get_custom_fields"):
+        getattr(inventory._api_session, name).return_value = ([], None)
+
+    resources = inventory._fetch_resources()
+
+    assert len(resources) * ZPECloudAPI.max_workers <= ZPECloudAPI.pool_maxsize
+
+
+def test_fetch_resources_request_exception(inventory):
+    """Exceptions raised while fetching resources must be raised to caller."""
+    inventory._api_session = MagicMock()
+    inventory._api_session.get_sites.side_effect = ConnectionError("Failure")
+
+    with pytest.raises(ConnectionError):
+        inventory._fetch_resources()
+
+
+""" Tests for _fetch_resources """
+""" Tests for _parse_devices """
+
+
+@pytest.fixture()
+def empty_inventory():
+    inventory = InventoryModule()
+    inventory.inventory = InventoryData()
+    for group in (
+        ZPECloudDefaultGroups.DEVICE_ENROLLED,
+        ZPECloudDefaultGroups.DEVICE_AVAILABLE,
+        ZPECloudDefaultGroups.DEVICE_ONLINE,
+        ZPECloudDefaultGroups.DEVICE_OFFLINE,
+        ZPECloudDefaultGroups.DEVICE_FAILOVER,
+    ):
+        inventory.inventory.add_group(group)
+
+    return inventory
+
+
+def test_parse_devices(empty_inventory):
+    """Devices must be added as hosts with variables, and assigned to default, site, and ZPE Cloud groups."""
+    group = ZPECloudGroup({"id": "10", "name": "My Group"})
+    site = ZPECloudSite({"id": "20", "name": "My Site"})
+    empty_inventory.inventory.add_group(group.name)
+    empty_inventory.inventory.add_group(site.name)
+
+    enrolled_devices = [
+        {
+            "id": "1",
+            "serial_number": "111",
+            "hostname": "nodegrid1",
+            "model": "NSR",
+            "version": "v5.10.1 (Jan 1 2024)",
+            "device_status": "Online",
+            "site": {"id": "20"},
+            "groups": [{"id": "10"}, {"id": "99"}],
+        },
+        {"id": "2", "serial_number": "222", "device_status": "Failover"},
+        {"id": "3", "device_status": "Online"},  # missing serial number
+    ]
+    available_devices = [{"id": "4", "serial_number": "444", "device_status": "Offline"}]
+
+    devices = empty_inventory._parse_devices(
+        (enrolled_devices, None), (available_devices, None), [group], [site]
+    )
+
+    assert [d.serial_number for d in devices] == ["111", "222", "444"]
+
+    groups = empty_inventory.inventory.get_groups_dict()
+    assert groups[ZPECloudDefaultGroups.DEVICE_ENROLLED] == ["111", "222"]
+    assert groups[ZPECloudDefaultGroups.DEVICE_AVAILABLE] == ["444"]
+    assert groups[ZPECloudDefaultGroups.DEVICE_ONLINE] == ["111"]
+    assert groups[ZPECloudDefaultGroups.DEVICE_FAILOVER] == ["222"]
+    assert groups[ZPECloudDefaultGroups.DEVICE_OFFLINE] == ["444"]
+    assert groups[group.name] == ["111"]
+    assert groups[site.name] == ["111"]
+
+    host_vars = empty_inventory.inventory.get_host("111").vars
+    assert host_vars["serial_number"] == "111"
+    assert host_vars["zpecloud_id"] == "1"
+    assert host_vars["hostname"] == "nodegrid1"
+    assert host_vars["version"] == "5.10.1"
+    assert host_vars["status"] == "online"
+    assert host_vars["model"] == "NSR"
+
+
+def test_parse_devices_request_fail(empty_inventory):
+    """Failure to fetch devices must raise error."""
+    with pytest.raises(AnsibleParserError):
+        empty_inventory._parse_devices((None, "Failure"), ([], None), [], [])
+
+
+""" Tests for _parse_devices """
+""" Tests for _parse_custom_fields """
+
+
+def test_parse_custom_fields(empty_inventory):
+    """Custom fields must be set as variables of existing groups, sites, and hosts, based on their scope."""
+    group = ZPECloudGroup({"id": "10", "name": "My Group"})
+    site = ZPECloudSite({"id": "20", "name": "My Site"})
+    empty_inventory.inventory.add_group(group.name)
+    empty_inventory.inventory.add_group(site.name)
+    devices = empty_inventory._parse_devices(
+        ([{"id": "1", "serial_number": "111", "device_status": "Online"}], None), ([], None), [], []
+    )
+
+    def custom_field(name, scope, reference):
+        return {"name": name, "enabled": True, "scope": scope, "reference": reference, "value": "1", "dynamic": False}
+
+    custom_fields = [
+        custom_field("global_var", "global", None),
+        custom_field("group_var", "group", "My Group"),
+        custom_field("site_var", "site", "My Site"),
+        custom_field("device_var", "device", "nodegrid 111"),
+        custom_field("other_device_var", "device", "nodegrid 111"),
+        custom_field("unknown_group_var", "group", "Unknown"),
+        custom_field("unknown_device_var", "device", "nodegrid 999"),
+    ]
+
+    empty_inventory._parse_custom_fields((custom_fields, None), devices)
+
+    inventory = empty_inventory.inventory
+    assert inventory.groups["all"].vars["zpecloud_cf_global_var"] == "1"
+    assert inventory.groups[group.name].vars == {"zpecloud_cf_group_var": "1"}
+    assert inventory.groups[site.name].vars == {"zpecloud_cf_site_var": "1"}
+    assert inventory.get_host("111").vars["zpecloud_cf_device_var"] == "1"
+    assert inventory.get_host("111").vars["zpecloud_cf_other_device_var"] == "1"
+    assert "zpecloud_group_unknown" not in inventory.groups
+    assert inventory.get_host("999") is None
+
+
+""" Tests for _parse_custom_fields """
+""" Tests for _validate_custom_fields """
+
+
+def test_validate_custom_fields_discard_default_and_disabled(inventory):
+    """Default and disabled custom fields must be discarded without warnings, and invalid ones warned."""
+    inventory.display = MagicMock()
+    custom_fields = [
+        {"name": "default.var", "enabled": True, "scope": "global", "reference": None, "value": "1", "dynamic": False},
+        {"name": "disabled_var", "enabled": False, "scope": "global", "reference": None, "value": "1", "dynamic": False},
+        {"name": "valid_var", "enabled": True, "scope": "global", "reference": None, "value": "1", "dynamic": False},
+        {"enabled": True, "scope": "global", "reference": None, "value": "1", "dynamic": False},
+    ]
+
+    with patch.object(ZPECustomFields, "__init__", autospec=True, side_effect=ZPECustomFields.__init__) as mock_init:
+        result = list(inventory._validate_custom_fields(custom_fields))
+
+    assert [cf.name for cf in result] == ["zpecloud_cf_valid_var"]
+    assert mock_init.call_count == 2
+    assert inventory.display.warning.call_count == 1
+
+
+""" Tests for _validate_custom_fields """
+""" Tests for _get_resources """
+
+
+@pytest.fixture()
+def cacheable_inventory():
+    inventory = InventoryModule()
+    inventory._cache = {}
+    inventory._create_api_session = MagicMock()
+    inventory._fetch_resources = MagicMock()
+    inventory._fetch_resources.return_value = {"groups": ([], None), "custom_fields": ([], None)}
+
+    return inventory
+
+
+def test_get_resources_cache_disabled(cacheable_inventory):
+    """Resources must be fetched, and not cached, when cache is disabled by user."""
+    cacheable_inventory.get_option = MagicMock(return_value=False)
+
+    resources = cacheable_inventory._get_resources("zpecloud.yml", True)
+
+    assert resources == {"groups": ([], None), "custom_fields": ([], None)}
+    assert cacheable_inventory._create_api_session.call_count == 1
+    assert cacheable_inventory._cache == {}
+
+
+def test_get_resources_from_cache(cacheable_inventory):
+    """Resources fetched must be cached, and next inventory parse must not authenticate, neither fetch resources."""
+    cacheable_inventory.get_option = MagicMock(return_value=True)
+
+    # cache is empty on first execution
+    cacheable_inventory._get_resources("zpecloud.yml", True)
+    assert cacheable_inventory._fetch_resources.call_count == 1
+    assert len(cacheable_inventory._cache) == 1
+
+    resources = cacheable_inventory._get_resources("zpecloud.yml", True)
+
+    assert resources == {"groups": ([], None), "custom_fields": ([], None)}
+    assert cacheable_inventory._create_api_session.call_count == 1
+    assert cacheable_inventory._fetch_resources.call_count == 1
+
+
+def test_get_resources_refresh_cache(cacheable_inventory):
+    """Ansible requesting to refresh the cache must fetch resources again."""
+    cacheable_inventory.get_option = MagicMock(return_value=True)
+    cache_key = cacheable_inventory._get_cache_key("zpecloud.yml", cacheable_inventory._get_config())
+    cacheable_inventory._cache[cache_key] = {"groups": ([{"id": "old"}], None)}
+
+    resources = cacheable_inventory._get_resources("zpecloud.yml", False)
+
+    assert resources == {"groups": ([], None), "custom_fields": ([], None)}
+    assert cacheable_inventory._cache[cache_key] == resources
+
+
+def test_get_resources_failure_not_cached(cacheable_inventory):
+    """Responses with errors must not be cached."""
+    cacheable_inventory.get_option = MagicMock(return_value=True)
+    cacheable_inventory._fetch_resources.return_value = {"groups": (None, "Failure")}
+
+    cacheable_inventory._get_resources("zpecloud.yml", True)
+
+    assert cacheable_inventory._cache == {}
+
+
+def test_get_cache_key_scoped_by_account(cacheable_inventory):
+    """Cache key must change with ZPE Cloud account, but not with password."""
+    config = {"url": "https://zpecloud.com", "username": "user", "password": "pass", "organization": "org"}
+    cache_key = cacheable_inventory._get_cache_key("zpecloud.yml", config)
+
+    assert cache_key.startswith(cacheable_inventory.get_cache_key("zpecloud.yml"))
+    assert len(cache_key.rsplit("_", 1)[1]) == 64
+    assert cache_key == cacheable_inventory._get_cache_key("zpecloud.yml", {**config, "password": "other"})
+    assert cache_key != cacheable_inventory._get_cache_key("zpecloud.yml", {**config, "organization": "other"})
+    assert cache_key != cacheable_inventory._get_cache_key("zpecloud.yml", {**config, "username": "other"})
+
+
+""" Tests for _get_resources """
+""" Tests for ZPECustomFields """
+
+
+@pytest.mark.parametrize(
+    ("custom_field"),
+    [
+        {"name": "default.var", "enabled": True, "scope": "global", "reference": None, "value": "1", "dynamic": False},
+        {"name": "disabled_var", "enabled": False, "scope": "global", "reference": None, "value": "1", "dynamic": False},
+        {"name": "no_enabled_var", "scope": "global", "reference": None, "value": "1", "dynamic": False},
+    ],
+)
+def test_custom_field_from_dict_discard_default_and_disabled(custom_field):
+    """Default and disabled custom fields are not used on Ansible."""
+    assert ZPECustomFields.from_dict(custom_field) is None
+
+
+@pytest.mark.parametrize(
+    ("reference", "expected"),
+    [("nodegrid 123456789", "123456789"), ("my nodegrid 123456789", "123456789"), ("123456789", "123456789")],
+)
+def test_custom_field_device_scope_reference(reference, expected):
+    """Serial number must be extracted from reference of custom fields with device scope."""
+    cf = ZPECustomFields(
+        {"name": "my-var", "enabled": True, "scope": "device", "reference": reference, "value": "1", "dynamic": False}
+    )
+
+    assert cf.name == "zpecloud_cf_my_var"
+    assert cf.reference == expected
+
+
+def test_custom_field_device_scope_empty_reference():
+    """Reference of custom fields with device scope without serial number must raise error."""
+    with pytest.raises(ZPECloudMissingBodyInfoError):
+        ZPECustomFields({"name": "my-var", "enabled": True, "scope": "device", "reference": "nodegrid ", "value": "1", "dynamic": False})
+
+
+@pytest.mark.parametrize(
+    ("scope", "reference", "expected"),
+    [("global", None, None), ("group", "My Group", "my_group"), ("site", "Site-1", "site_1")],
+)
+def test_custom_field_scope_reference(scope, reference, expected):
+    """Reference of custom fields must be resolved based on their scope."""
+    cf = ZPECustomFields(
+        {"name": "my-var", "enabled": True, "scope": scope, "reference": reference, "value": "1", "dynamic": False}
+    )
+
+    assert cf.scope == scope
+    assert cf.reference == expected
+
+
+@pytest.mark.parametrize(
+    ("scope", "reference"),
+    [("group", None), ("site", None), ("device", None), ("invalid", "reference")],
+)
+def test_custom_field_invalid_scope_or_missing_reference(scope, reference):
+    """Invalid scope, or missing reference for non global scopes, must raise error."""
+    with pytest.raises(ZPECloudMissingBodyInfoError):
+        ZPECustomFields({"name": "my-var", "enabled": True, "scope": scope, "reference": reference, "value": "1", "dynamic": False})
+
+
+""" Tests for ZPECustomFields """
+""" Tests for name_sanitization """
+
+
+@pytest.mark.parametrize(
+    ("name", "expected"),
+    [
+        ("My site-1", "my_site_1"),
+        ("Group.A/B", "group_a_b"),
+        ("already_valid_1", "already_valid_1"),
+        ("", ""),
+        ("Café Nodegrid", "caf__nodegrid"),
+    ],
+)
+def test_name_sanitization(name, expected):
+    """Invalid characters must be replaced by underscore, and names converted to lowercase."""
+    assert name_sanitization(name) == expected
+    # cached result must match
+    assert name_sanitization(name) == expected
+
+
+""" Tests for name_sanitization """
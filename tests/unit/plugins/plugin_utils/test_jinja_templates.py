@@ -0,0 +1,111 @@
+# Copyright (c) 2024, ZPE Systems <zpesystems.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import base64
+import io
+import os
+import pytest
+import subprocess
+import sys
+import zipfile
+
+if not sys.warnoptions:
+    import warnings
+
+    warnings.simplefilter("ignore")
+
+from ansible_collections.zpe.zpecloud.plugins.plugin_utils.jinja_templates import (
+    render_exec_command,
+    render_fetch_file,
+)
+
+
+""" Tests for render_exec_command """
+
+
+@pytest.mark.parametrize(
+    ("command", "expected"),
+    [
+        ("ls -la '/tmp' && echo ok", "#!/bin/bash\n\nls -la '/tmp' && echo ok\n"),
+        ('echo {{ x }} "{y}"\n', '#!/bin/bash\n\necho {{ x }} "{y}"\n\n'),
+    ],
+)
+def test_render_exec_command(command, expected):
+    """Command must be inserted as is inside bash script."""
+    profile, err = render_exec_command(command)
+    assert err is None
+    assert profile == expected
+
+
+""" Tests for render_exec_command """
+""" Tests for render_fetch_file """
+
+
+@pytest.mark.parametrize(
+    ("content"),
+    [b"", b"some text", bytes(range(256)) * 1000],
+    ids=["empty", "text", "binary"],
+)
+def test_render_fetch_file(tmp_path, content):
+    """Rendered script must print file from host compressed inside zip file, and encoded to base64."""
+    in_path = tmp_path / "file.bin"
+    in_path.write_bytes(content)
+    script = tmp_path / "fetch.py"
+    profile, err = render_fetch_file(str(in_path), "original-file", 1024 * 1024)
+    assert err is None
+    script.write_text(profile)
+
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, check=True)
+
+    with zipfile.ZipFile(io.BytesIO(base64.b64decode(result.stdout))) as zf:
+        assert zf.read("original-file") == content
+
+
+@pytest.mark.parametrize(
+    ("filename", "expected"),
+    [("file.bin", zipfile.ZIP_DEFLATED), ("file.tar.gz", zipfile.ZIP_STORED)],
+)
+def test_render_fetch_file_compression_method(tmp_path, filename, expected):
+    """Rendered script must store files already compressed by their format without compression."""
+    in_path = tmp_path / filename
+    in_path.write_bytes(b"some text" * 100)
+    script = tmp_path / "fetch.py"
+    profile, err = render_fetch_file(str(in_path), "original-file", 1024 * 1024)
+    script.write_text(profile)
+
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, check=True)
+
+    with zipfile.ZipFile(io.BytesIO(base64.b64decode(result.stdout))) as zf:
+        assert zf.getinfo("original-file").compress_type == expected
+        assert zf.read("original-file") == b"some text" * 100
+
+
+def test_render_fetch_file_timestamp_before_1980(tmp_path):
+    """Rendered script must fetch files with modification time before 1980, e.g. from devices without a valid clock."""
+    in_path = tmp_path / "file.bin"
+    in_path.write_bytes(b"some text")
+    os.utime(in_path, (1, 1))
+    script = tmp_path / "fetch.py"
+    profile, err = render_fetch_file(str(in_path), "original-file", 1024 * 1024)
+    script.write_text(profile)
+
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, check=True)
+
+    with zipfile.ZipFile(io.BytesIO(base64.b64decode(result.stdout))) as zf:
+        assert zf.read("original-file") == b"some text"
+
+
+def test_render_fetch_file_too_big(tmp_path):
+    """Rendered script must fail for files bigger than limit."""
+    in_path = tmp_path / "file.bin"
+    in_path.write_bytes(b"a" * 100)
+    script = tmp_path / "fetch.py"
+    profile, err = render_fetch_file(str(in_path), "original-file", 10)
+    script.write_text(profile)
+
+    result = subprocess.run([sys.executable, str(script)], capture_output=True)
+
+    assert result.returncode == 1
+
+
+""" Tests for render_fetch_file """
@@ -0,0 +1,48 @@
+# Copyright (c) 2024, ZPE Systems <zpesystems.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import json
+import pytest
+import sys
+
+if not sys.warnoptions:
+    import warnings
+
+    warnings.simplefilter("ignore")
+
+from unittest.mock import patch
+
+from ansible_collections.zpe.zpecloud.plugins.plugin_utils import serialization
+
+
+""" Tests for loads """
+
+
+@pytest.mark.parametrize("content", ['{"list": [{"id": "1"}], "count": 1}', b'{"list": [{"id": "1"}], "count": 1}'])
+def test_loads(content):
+    """JSON content must be parsed from both str and bytes."""
+    assert serialization.loads(content) == {"list": [{"id": "1"}], "count": 1}
+
+
+def test_loads_invalid_content():
+    """Invalid JSON content must raise ValueError."""
+    with pytest.raises(ValueError):
+        serialization.loads("{invalid")
+
+
+""" Tests for loads """
+""" Tests for dumps """
+
+
+@pytest.mark.parametrize("has_orjson", [True, False])
+def test_dumps(has_orjson):
+    """Objects must be serialized to JSON encoded bytes, with or without orjson."""
+    obj = {"cookies": [{"name": "token", "value": "abc"}], "organization_name": "org"}
+    with patch.object(serialization, "HAS_ORJSON", has_orjson and serialization.HAS_ORJSON):
+        content = serialization.dumps(obj)
+
+    assert isinstance(content, bytes)
+    assert json.loads(content) == obj
+
+
+""" Tests for dumps """
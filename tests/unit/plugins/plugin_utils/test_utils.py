@@ -1,8 +1,13 @@
 # Copyright (c) 2024, ZPE Systems <zpesystems.com>
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
+import base64
+import io
+import os
 import pytest
 import sys
+import zipfile
+from unittest.mock import patch
 
 if not sys.warnoptions:
     import warnings
@@ -11,6 +16,13 @@ if not sys.warnoptions:
 
 from ansible_collections.zpe.zpecloud.plugins.plugin_utils.utils import (
     exponential_backoff_delay,
+    compress_encode_file,
+    decode_base64,
+    encode_base64,
+    extract_file,
+    make_private_dir,
+    read_private_file,
+    write_private_file,
 )
 
 
@@ -26,6 +38,7 @@ from ansible_collections.zpe.zpecloud.plugins.plugin_utils.utils import (
         (3, 256, 4),
         (7, 256, 64),
         (10, 256, 256),
+        (5000, 256, 256),
     ],
 )
 def test_exponential_backoff_delay(attempt, max_delay, expected):
@@ -33,4 +46,267 @@ def test_exponential_backoff_delay(attempt, max_delay, expected):
     assert exponential_backoff_delay(attempt, max_delay) == expected
 
 
+@pytest.mark.parametrize(
+    ("attempt", "max_delay", "base_delay", "expected"),
+    [
+        (0, 5, 0.25, 0.25),
+        (1, 5, 0.25, 0.25),
+        (2, 5, 0.25, 0.5),
+        (4, 5, 0.25, 2),
+        (6, 5, 0.25, 5),
+        (0, 0.1, 0.25, 0.1),
+        (5000, 5, 0.25, 5),
+    ],
+)
+def test_exponential_backoff_delay_base_delay(attempt, max_delay, base_delay, expected):
+    """Check output exponential backoff delay starting from custom delay."""
+    assert exponential_backoff_delay(attempt, max_delay, base_delay) == expected
+
+
 """ Tests for exponential_backoff_delay """
+""" Tests for compress_encode_file """
+
+
+@pytest.mark.parametrize(
+    ("content"),
+    [b"", b"a", b"ab", b"abc", b"some file content\n" * 1000, bytes(range(256)) * 100],
+)
+def test_compress_encode_file(tmp_path, content):
+    """File compressed and encoded must be restored by decoding and extracting it."""
+    in_path = tmp_path / "somefile"
+    in_path.write_bytes(content)
+
+    encoded_file, err = compress_encode_file(str(in_path), "original-file")
+    assert err is None
+
+    decoded_file, err = decode_base64(encoded_file)
+    assert err is None
+
+    extracted_file, err = extract_file(decoded_file, "original-file")
+    assert err is None
+    assert extracted_file == content
+
+
+def test_compress_encode_file_not_found(tmp_path):
+    """File that does not exist must return error."""
+    encoded_file, err = compress_encode_file(str(tmp_path / "missing"), "original-file")
+    assert encoded_file is None
+    assert err is not None
+
+
+@pytest.mark.parametrize(
+    ("filename", "expected"),
+    [("somefile.txt", zipfile.ZIP_DEFLATED), ("somefile.tar.gz", zipfile.ZIP_STORED), ("IMAGE.PNG", zipfile.ZIP_STORED)],
+)
+def test_compress_encode_file_compression_method(tmp_path, filename, expected):
+    """Files already compressed by their format must be stored without compression."""
+    in_path = tmp_path / filename
+    in_path.write_bytes(b"some file content\n" * 100)
+
+    encoded_file, err = compress_encode_file(str(in_path), "original-file")
+    assert err is None
+
+    with zipfile.ZipFile(io.BytesIO(base64.b64decode(encoded_file))) as zf:
+        assert zf.getinfo("original-file").compress_type == expected
+        assert zf.read("original-file") == b"some file content\n" * 100
+
+
+def test_compress_encode_file_timestamp_before_1980(tmp_path):
+    """Files with modification time before 1980, e.g. from devices without a valid clock, must be compressed."""
+    in_path = tmp_path / "somefile"
+    in_path.write_bytes(b"some file content")
+    os.utime(in_path, (1, 1))
+
+    encoded_file, err = compress_encode_file(str(in_path), "original-file")
+    assert err is None
+
+    extracted_file, err = extract_file(base64.b64decode(encoded_file), "original-file")
+    assert err is None
+    assert extracted_file == b"some file content"
+
+
+""" Tests for compress_encode_file """
+""" Tests for encode_base64 """
+
+
+@pytest.mark.parametrize(
+    ("content"),
+    [b"", b"a", b"ab", b"abc", bytes(range(256)) * 100],
+)
+def test_encode_base64(content):
+    """Encoded data must match standard base64 without newlines."""
+    encoded, err = encode_base64(content)
+    assert err is None
+    assert encoded == base64.b64encode(content)
+
+
+def test_encode_base64_invalid_data():
+    """Data that is not bytes must return error."""
+    encoded, err = encode_base64("some text")
+    assert encoded is None
+    assert err is not None
+
+
+@patch("ansible_collections.zpe.zpecloud.plugins.plugin_utils.utils.HAS_PYBASE64", True)
+@patch("ansible_collections.zpe.zpecloud.plugins.plugin_utils.utils.pybase64", create=True)
+def test_encode_decode_base64_use_pybase64(mock_pybase64):
+    """pybase64 must be used to encode, and decode, data when available."""
+    mock_pybase64.b64encode.return_value = b"YWJj"
+    mock_pybase64.b64decode.return_value = b"abc"
+
+    assert encode_base64(b"abc") == (b"YWJj", None)
+    assert decode_base64(b"YWJj") == (b"abc", None)
+    mock_pybase64.b64encode.assert_called_once_with(b"abc")
+    mock_pybase64.b64decode.assert_called_once_with(b"YWJj")
+
+
+""" Tests for encode_base64 """
+""" Tests for extract_file """
+
+
+def _zip_file(content, filename, compression=zipfile.ZIP_DEFLATED):
+    mem_zip = io.BytesIO()
+    with zipfile.ZipFile(mem_zip, mode="w", compression=compression) as zf:
+        zf.writestr(filename, content)
+    return mem_zip.getvalue()
+
+
+@pytest.mark.parametrize(
+    ("compression"),
+    [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED],
+)
+@pytest.mark.parametrize(
+    ("content"),
+    [b"", b"some text", bytes(range(256)) * 1000],
+)
+def test_extract_file(content, compression):
+    """Content of member from zip file must be extracted, for deflated and stored members."""
+    extracted, err = extract_file(_zip_file(content, "original-file", compression), "original-file")
+    assert err is None
+    assert extracted == content
+
+
+def test_extract_file_wrong_filename():
+    """Zip file without expected member must return error."""
+    extracted, err = extract_file(_zip_file(b"some text", "other-file"), "original-file")
+    assert extracted is None
+    assert err is not None
+
+
+def test_extract_file_corrupted_data():
+    """Corrupted zip file must return error."""
+    data = bytearray(_zip_file(b"some text" * 100, "original-file"))
+    data[40:50] = b"\x00" * 10
+
+    extracted, err = extract_file(bytes(data), "original-file")
+    assert extracted is None
+    assert err is not None
+
+
+""" Tests for extract_file """
+""" Tests for write_private_file """
+
+
+def test_write_private_file_replace_symlink(tmp_path):
+    """Private file must be created with mode 0600, and a symlink planted on its path must be replaced, not followed."""
+    target = tmp_path / "target"
+    target.write_bytes(b"original")
+    out_path = tmp_path / "cache"
+    out_path.symlink_to(target)
+
+    result, err = write_private_file(str(out_path), b"content")
+
+    assert err is None
+    assert not out_path.is_symlink()
+    assert out_path.read_bytes() == b"content"
+    assert os.stat(out_path).st_mode & 0o777 == 0o600
+    assert target.read_bytes() == b"original"
+    assert sorted(os.listdir(tmp_path)) == ["cache", "target"]
+
+
+""" Tests for write_private_file """
+""" Tests for read_private_file """
+
+
+def test_read_private_file(tmp_path):
+    """File written by write_private_file must be read back."""
+    path = str(tmp_path / "cache")
+    write_private_file(path, b"content")
+
+    assert read_private_file(path, max_age=60) == (b"content", None)
+
+
+@pytest.mark.parametrize(("mode"), [0o644, 0o640, 0o604, 0o400])
+def test_read_private_file_reject_mode(tmp_path, mode):
+    """Files that other users can access, or with unexpected mode, must be rejected."""
+    path = tmp_path / "cache"
+    path.write_bytes(b"content")
+    os.chmod(path, mode)
+
+    content, err = read_private_file(str(path))
+
+    assert content is None
+    assert err is not None
+
+
+def test_read_private_file_reject_symlink(tmp_path):
+    """Symbolic links must not be followed."""
+    target = str(tmp_path / "target")
+    write_private_file(target, b"content")
+    os.symlink(target, tmp_path / "cache")
+
+    content, err = read_private_file(str(tmp_path / "cache"))
+
+    assert content is None
+    assert err is not None
+
+
+@patch("ansible_collections.zpe.zpecloud.plugins.plugin_utils.utils.os.getuid", return_value=12345)
+def test_read_private_file_reject_other_owner(mock_getuid, tmp_path):
+    """Files owned by other user must be rejected."""
+    path = str(tmp_path / "cache")
+    write_private_file(path, b"content")
+
+    content, err = read_private_file(path)
+
+    assert content is None
+    assert err is not None
+
+
+def test_read_private_file_expired(tmp_path):
+    """Files older than max age must be rejected."""
+    path = str(tmp_path / "cache")
+    write_private_file(path, b"content")
+    os.utime(path, (0, 0))
+
+    content, err = read_private_file(path, max_age=60)
+
+    assert content is None
+    assert err is not None
+
+
+""" Tests for read_private_file """
+""" Tests for make_private_dir """
+
+
+def test_make_private_dir(tmp_path):
+    """Directory must be created only accessible by the current user."""
+    path = tmp_path / "ansible" / "zpecloud"
+
+    assert make_private_dir(str(path)) == (True, None)
+    assert os.stat(path).st_mode & 0o777 == 0o700
+
+
+def test_make_private_dir_reject_shared_dir(tmp_path):
+    """Existing directory accessible by other users must be rejected."""
+    path = tmp_path / "zpecloud"
+    path.mkdir()
+    os.chmod(path, 0o777)
+
+    result, err = make_private_dir(str(path))
+
+    assert not result
+    assert err is not None
+
+
+""" Tests for make_private_dir """
@@ -1,7 +1,6 @@
 # Copyright (c) 2024, ZPE Systems <zpesystems.com>
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
-import os
 import pytest
 import sys
 from unittest.mock import MagicMock
@@ -9,11 +8,12 @@ from unittest.mock import patch
 
 from ansible.playbook.play_context import PlayContext
 
-from ansible.errors import AnsibleActionFail
+from ansible.errors import AnsibleActionFail, AnsibleConnectionFailure
 
 from ansible_collections.zpe.zpecloud.plugins.action.software_upgrade import (
     ActionModule,
 )
+from ansible_collections.zpe.zpecloud.plugins.connection.zpecloud import Connection
 
 if not sys.warnoptions:
     import warnings
@@ -54,149 +54,74 @@ def test_create_api_session_missing_connection_options(action):
         action._create_api_session()
 
 
-@pytest.mark.parametrize(
-    ("configuration"),
-    [
-        {"username": None, "password": "mysecurepassword"},
-        {"username": "myuser@myemail.com", "password": None},
-    ],
-)
-def test_create_api_session_missing_required_configuration_raise_error(
-    configuration, action
-):
-    """Playbook without credentials on variables, neither on env, must raise error."""
-    _options = configuration
-
-    def _get_option_side_effect(*args):
-        return _options.get(*args)
-
-    action._connection.get_option.side_effect = _get_option_side_effect
-
-    with pytest.raises(AnsibleActionFail):
-        action._create_api_session()
-
-
-@patch(
-    "ansible_collections.zpe.zpecloud.plugins.plugin_utils.zpecloud_action_base.ZPECloudAPI"
-)
-def test_create_api_session_read_credentials_from_playbook_vars(
-    mock_zpe_cloud_api, action
-):
-    """Test reading configuration from playbook variables.
-    Username, password, and organization are defined on playbook.
-    """
-    mock_zpe_cloud_api.return_value.authenticate_with_password.return_value = ("", None)
-    mock_zpe_cloud_api.return_value.change_organization.return_value = (True, None)
+def test_create_api_session_from_connection(action):
+    """Session must be created by the connection plugin, and shared with the action."""
+    api_session = MagicMock()
+    action._connection = MagicMock(_api_session=None)
 
-    _options = {
-        "username": "myuser@myemail.com",
-        "password": "mysecurepassword",
-        "organization": "My organization",
-    }
+    def _create_api_session_side_effect():
+        action._connection._api_session = api_session
 
-    def _get_option_side_effect(*args):
-        return _options.get(*args)
-
-    action._connection.get_option.side_effect = _get_option_side_effect
+    action._connection._create_api_session.side_effect = _create_api_session_side_effect
 
     action._create_api_session()
 
-    mock_zpe_cloud_api.assert_called_with("https://zpecloud.com")
-    mock_zpe_cloud_api.return_value.authenticate_with_password.assert_called_with(
-        _options.get("username"), _options.get("password")
-    )
-    mock_zpe_cloud_api.return_value.change_organization.assert_called_with(
-        _options.get("organization")
-    )
+    action._connection._create_api_session.assert_called_once()
+    assert action._api_session == api_session
 
 
-@patch(
-    "ansible_collections.zpe.zpecloud.plugins.plugin_utils.zpecloud_action_base.ZPECloudAPI"
-)
-def test_create_api_session_read_credentials_from_env_variable(
-    mock_zpe_cloud_api, action
-):
-    """Test reading configuration from environment variables."""
-    mock_zpe_cloud_api.return_value.authenticate_with_password.return_value = ("", None)
-    mock_zpe_cloud_api.return_value.change_organization.return_value = (True, None)
-    action._connection.get_option.return_value = None
-
-    _options = {
-        "ZPECLOUD_USERNAME": "myuser@myemail.com",
-        "ZPECLOUD_PASSWORD": "mysecurepassword",
-        "ZPECLOUD_ORGANIZATION": "My organization",
-    }
-
-    os.environ["ZPECLOUD_USERNAME"] = _options.get("ZPECLOUD_USERNAME")
-    os.environ["ZPECLOUD_PASSWORD"] = _options.get("ZPECLOUD_PASSWORD")
-    os.environ["ZPECLOUD_ORGANIZATION"] = _options.get("ZPECLOUD_ORGANIZATION")
+def test_create_api_session_reuse_connection_session(action):
+    """Session already authenticated by the connection must be reused without a new login."""
+    api_session = MagicMock()
+    action._connection = MagicMock(_api_session=api_session)
 
     action._create_api_session()
 
-    mock_zpe_cloud_api.assert_called_with("https://zpecloud.com")
-    mock_zpe_cloud_api.return_value.authenticate_with_password.assert_called_with(
-        _options.get("ZPECLOUD_USERNAME"), _options.get("ZPECLOUD_PASSWORD")
-    )
-    mock_zpe_cloud_api.return_value.change_organization.assert_called_with(
-        _options.get("ZPECLOUD_ORGANIZATION")
-    )
+    action._connection._create_api_session.assert_not_called()
+    assert action._api_session == api_session
 
 
-@patch(
-    "ansible_collections.zpe.zpecloud.plugins.plugin_utils.zpecloud_action_base.ZPECloudAPI"
-)
-def test_create_api_session_zpe_cloud_api_authentication_fail(
-    mock_zpe_cloud_api, action
-):
-    """Failure while creating ZPECloudAPI instance."""
-    mock_zpe_cloud_api.return_value.authenticate_with_password.return_value = (
-        "",
-        "Authentication error",
+def test_create_api_session_connection_fail_raise_action_fail(action):
+    """Failures from connection plugin, e.g. missing credentials, must be raised as action failures."""
+    action._connection = MagicMock(_api_session=None)
+    action._connection._create_api_session.side_effect = AnsibleConnectionFailure(
+        "Could not retrieve ZPE Cloud username from plugin configuration or environment."
     )
 
-    _options = {"username": "myuser@myemail.com", "password": "mysecurepassword"}
-
-    def _get_option_side_effect(*args):
-        return _options.get(*args)
-
-    action._connection.get_option.side_effect = _get_option_side_effect
-
-    with pytest.raises(AnsibleActionFail):
+    with pytest.raises(AnsibleActionFail) as err:
         action._create_api_session()
 
-    mock_zpe_cloud_api.return_value.authenticate_with_password.assert_called_with(
-        _options.get("username"), _options.get("password")
-    )
+    assert "Could not retrieve ZPE Cloud username" in str(err.value)
 
 
-@patch(
-    "ansible_collections.zpe.zpecloud.plugins.plugin_utils.zpecloud_action_base.ZPECloudAPI"
-)
-def create_api_session_switch_organization_fail(mock_zpe_cloud_api, action):
-    """Failure while performing call to switch organization."""
-    mock_zpe_cloud_api.return_value.authenticate_with_password.return_value = ("", None)
-    mock_zpe_cloud_api.return_value.change_organization.return_value = (
-        False,
-        "Failure",
-    )
+@patch("ansible_collections.zpe.zpecloud.plugins.connection.zpecloud.ZPECloudAPI")
+def test_create_api_session_reuse_session_across_tasks(mock_zpe_cloud_api, action, tmp_path):
+    """Actions from next tasks must restore the session stored on disk, instead of a new login."""
+    mock_zpe_cloud_api.return_value.authenticate_with_password.return_value = (True, None)
+    mock_zpe_cloud_api.return_value.change_organization.return_value = (True, None)
+    mock_zpe_cloud_api.return_value.export_session.return_value = {"cookies": []}
+    mock_zpe_cloud_api.return_value.import_session.return_value = (True, None)
 
     _options = {
-        "username": "myuser@myemail.com",
+        "username": "action-task@myemail.com",
         "password": "mysecurepassword",
-        "organization": "New organization",
+        "organization": "My organization",
     }
 
     def _get_option_side_effect(*args):
         return _options.get(*args)
 
-    action._connection.get_option.side_effect = _get_option_side_effect
+    # Ansible creates a new connection for each task
+    for _ in range(2):
+        connection = Connection(PlayContext(), "/dev/null")
+        connection.session_cache_dir = str(tmp_path)
+        connection.get_option = MagicMock(side_effect=_get_option_side_effect)
+        action._connection = connection
 
-    with pytest.raises(AnsibleActionFail):
         action._create_api_session()
 
-    mock_zpe_cloud_api.return_value.change_organization.assert_called_with(
-        _options.get("organization")
-    )
+    assert mock_zpe_cloud_api.return_value.authenticate_with_password.call_count == 1
+    assert action._api_session == mock_zpe_cloud_api.return_value
 
 
 """ Tests for _create_api_session """
@@ -0,0 +1,394 @@
+# Copyright (c) 2024, ZPE Systems <zpesystems.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import gzip
+import json
+import pytest
+import requests
+import sys
+from unittest.mock import MagicMock
+
+from ansible_collections.zpe.zpecloud.plugins.plugin_utils.zpecloud_api import (
+    ZPECloudAPI,
+)
+
+if not sys.warnoptions:
+    import warnings
+
+    warnings.simplefilter("ignore")
+
+
+@pytest.fixture()
+def api():
+    api = ZPECloudAPI("https://zpecloud.com")
+    api._zpe_cloud_session = MagicMock()
+
+    return api
+
+
+def _response(status_code, text="", reason=""):
+    return MagicMock(status_code=status_code, text=text, content=text.encode(), reason=reason)
+
+
+""" Tests for __init__ """
+
+
+def test_session_pooled_adapter_with_retries():
+    """Session must reuse connections, and retry idempotent requests rejected by rate limit, server or gateway errors."""
+    api = ZPECloudAPI("https://zpecloud.com")
+
+    adapter = api._zpe_cloud_session.get_adapter("https://api.zpecloud.com/device")
+    assert adapter._pool_maxsize == ZPECloudAPI.pool_maxsize
+    assert adapter.max_retries.total == ZPECloudAPI.max_retries
+    assert set(adapter.max_retries.status_forcelist) == {429, 500, 502, 503, 504}
+    assert "POST" not in adapter.max_retries.allowed_methods
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        ("zpecloud.com", "https://api.zpecloud.com"),
+        ("www.zpecloud.com", "https://api.zpecloud.com"),
+        ("https://www.zpecloud.com/", "https://api.zpecloud.com"),
+        ("http://zpecloud.com", "https://api.zpecloud.com"),
+        ("https://eu.zpecloud.com", "https://api.eu.zpecloud.com"),
+        ("https://newwww.example.com", "https://api.newwww.example.com"),
+    ],
+)
+def test_api_url(url, expected):
+    """API URL must be built from ZPE Cloud URL, with or without scheme and www prefix."""
+    assert ZPECloudAPI(url)._url == expected
+
+
+@pytest.mark.parametrize(
+    ("url", "status_code", "expected"),
+    [
+        ("https://api.zpecloud.com/device", 200, False),
+        ("https://api.zpecloud.com/device", 404, False),
+        ("https://api.zpecloud.com/device", 403, False),
+        ("https://api.zpecloud.com/device", 401, True),
+        ("https://storage.zpecloud.com/output.txt", 401, False),
+    ],
+)
+def test_session_rejected_by_zpecloud(url, status_code, expected):
+    """Only authentication errors from ZPE Cloud API must flag the session as rejected, until a new login succeeds."""
+    api = ZPECloudAPI("https://zpecloud.com")
+
+    response = _response(status_code)
+    response.url = url
+    for hook in api._zpe_cloud_session.hooks["response"]:
+        hook(response)
+
+    assert api.unauthorized is expected
+
+    api._zpe_cloud_session = MagicMock()
+    api._zpe_cloud_session.post.return_value = _response(200, text=json.dumps({"company": {"business_name": "org"}}))
+    assert api.authenticate_with_password("user", "password") == (True, None)
+    assert api.unauthorized is False
+
+
+""" Tests for __init__ """
+""" Tests for change_organization """
+
+
+def test_change_organization_reuse_company_list(api):
+    """Company list must be fetched once, and reused for following organization changes."""
+    companies = [{"business_name": "org a", "id": "1"}, {"business_name": "org b", "id": "2"}]
+    api._get_json = MagicMock(return_value=(companies, None))
+    api._post = MagicMock(return_value=("", None))
+
+    assert api.change_organization("org a") == (True, None)
+    assert api.change_organization("org b") == (True, None)
+
+    api._get_json.assert_called_once()
+    assert api._post.call_args.kwargs["url"] == "https://api.zpecloud.com/user/auth/2"
+
+
+def test_change_organization_refresh_unknown_company(api):
+    """Organization missing from cached list must trigger a new company list request."""
+    api._get_json = MagicMock(
+        side_effect=[
+            ([{"business_name": "org a", "id": "1"}], None),
+            ([{"business_name": "org a", "id": "1"}, {"business_name": "org c", "id": "3"}], None),
+        ]
+    )
+    api._post = MagicMock(return_value=("", None))
+
+    assert api.change_organization("org a") == (True, None)
+    assert api.change_organization("org c") == (True, None)
+
+    assert api._get_json.call_count == 2
+
+
+def test_change_organization_auth_fail_clear_company_list(api):
+    """Failure to switch organization must discard cached company list."""
+    api._get_json = MagicMock(return_value=([{"business_name": "org a", "id": "1"}], None))
+    api._post = MagicMock(return_value=("", "Forbidden"))
+
+    assert api.change_organization("org a") == (False, "Forbidden")
+    assert api._companies_by_name is None
+
+
+def test_change_organization_not_found(api):
+    """Organization not available for user must return error."""
+    api._get_json = MagicMock(return_value=([{"business_name": "org a", "id": "1"}], None))
+
+    result, err = api.change_organization("org x")
+
+    assert result is False
+    assert err == "Organization org x was not found or not authorized"
+
+
+""" Tests for change_organization """
+""" Tests for get_job """
+
+
+def test_get_job_conditional_request(api):
+    """Job details should be requested with ETag from previous response, and reused when not modified."""
+    first = _response(200, text='{"operation": {"status": "Started"}}')
+    first.headers = {"ETag": '"abc"'}
+    not_modified = _response(304)
+    api._zpe_cloud_session.get.side_effect = [first, not_modified]
+
+    content, err = api.get_job("1234")
+    assert err is None
+    assert content == '{"operation": {"status": "Started"}}'
+    assert api._zpe_cloud_session.get.call_args.kwargs["url"] == "https://api.zpecloud.com/job/1234/details"
+    assert api._zpe_cloud_session.get.call_args.kwargs["params"] == {"jobId": "1234"}
+    assert api._zpe_cloud_session.get.call_args.kwargs["headers"] == {}
+
+    content, err = api.get_job("1234")
+    assert err is None
+    assert content == '{"operation": {"status": "Started"}}'
+    assert api._zpe_cloud_session.get.call_args.kwargs["headers"] == {"If-None-Match": '"abc"'}
+
+
+def test_get_job_finished_not_cached(api):
+    """Cached details must be discarded once job finishes, as finished jobs are not polled anymore."""
+    running = _response(200, text='{"operation": {"status": "Started"}}')
+    running.headers = {"ETag": '"abc"'}
+    finished = _response(200, text='{"operation": {"status": "Successful"}, "output_file": "url"}')
+    finished.headers = {"ETag": '"def"'}
+    api._zpe_cloud_session.get.side_effect = [running, finished]
+
+    api.get_job("1234")
+    assert "1234" in api._job_details
+
+    content, err = api.get_job("1234")
+    assert err is None
+    assert content == '{"operation": {"status": "Successful"}, "output_file": "url"}'
+    assert api._job_details == {}
+
+
+def test_get_job_request_fail(api):
+    """Failure to get job details must return error."""
+    api._zpe_cloud_session.get.return_value = _response(502, reason="Bad Gateway")
+
+    content, err = api.get_job("1234")
+
+    assert content is None
+    assert err == "Bad Gateway"
+
+
+""" Tests for get_job """
+""" Tests for download_file """
+
+
+def test_download_file_streamed(api):
+    """File content must be joined from streamed chunks."""
+    r = _response(200)
+    r.iter_content.return_value = [b"some", b"thing"]
+    api._zpe_cloud_session.get.return_value.__enter__.return_value = r
+
+    content, err = api.download_file("someurl")
+
+    assert err is None
+    assert content == b"something"
+    assert api._zpe_cloud_session.get.call_args.kwargs["stream"] is True
+
+
+def test_download_file_request_fail(api):
+    """Failure to download file must return error."""
+    api._zpe_cloud_session.get.return_value.__enter__.return_value = _response(404, reason="Not Found")
+
+    content, err = api.download_file("someurl")
+
+    assert content is None
+    assert err == "Not Found"
+
+
+""" Tests for download_file """
+""" Tests for create_profile """
+
+
+def test_create_profile_compressed_upload(api):
+    """Upload body must be compressed with gzip when requested."""
+    api._zpe_cloud_session = requests.Session()
+    api._zpe_cloud_session.send = MagicMock(return_value=_response(201, text='{"id": "123"}'))
+
+    files = (("name", (None, "profile")), ("file", ("profile", "echo foo\n" * 1000)))
+    content, err = api.create_profile(files, compress=True)
+
+    assert err is None
+    assert content == {"id": "123"}
+
+    request = api._zpe_cloud_session.send.call_args.args[0]
+    assert request.headers["Content-Encoding"] == "gzip"
+    assert request.headers["Content-Length"] == str(len(request.body))
+    assert b"echo foo" in gzip.decompress(request.body)
+
+
+def test_create_profile_small_upload_not_compressed(api):
+    """Small upload bodies are sent without compression."""
+    api._zpe_cloud_session = requests.Session()
+    api._zpe_cloud_session.send = MagicMock(return_value=_response(201, text='{"id": "123"}'))
+
+    files = (("file", ("profile", "echo foo")),)
+    content, err = api.create_profile(files, compress=True)
+
+    assert err is None
+    request = api._zpe_cloud_session.send.call_args.args[0]
+    assert "Content-Encoding" not in request.headers
+
+
+""" Tests for create_profile """
+""" Tests for get_enrolled_devices """
+
+
+def _device_pages(device_count, page_size):
+    """Simulate paginated device endpoint."""
+
+    def _get(url, params):
+        offset = params["offset"]
+        devices = [{"id": str(i)} for i in range(offset, min(offset + page_size, device_count))]
+        return {"count": device_count, "list": devices}, None
+
+    return _get
+
+
+@pytest.mark.parametrize(
+    ("device_count", "page_size"),
+    [(0, 50), (1, 50), (50, 50), (51, 50), (1234, 50), (120, 20)],
+)
+def test_get_enrolled_devices_pages(api, device_count, page_size):
+    """Devices from all pages must be returned in order, including servers with smaller page limit."""
+    api._get_json = MagicMock(side_effect=_device_pages(device_count, page_size))
+
+    devices, err = api.get_enrolled_devices()
+
+    assert err is None
+    assert [d["id"] for d in devices] == [str(i) for i in range(device_count)]
+    assert api._get_json.call_count == max(1, -(-device_count // page_size))
+    assert all(c.kwargs["url"] == "https://api.zpecloud.com/device" for c in api._get_json.call_args_list)
+    assert all(c.kwargs["params"]["enrolled"] == 1 for c in api._get_json.call_args_list)
+    assert all(c.kwargs["params"]["limit"] == 500 for c in api._get_json.call_args_list)
+
+
+def test_get_enrolled_devices_page_fail(api):
+    """Failure on any page must return error."""
+    pages = _device_pages(200, 50)
+
+    def _get(url, params):
+        if params["offset"] == 100:
+            return None, "Bad Gateway"
+        return pages(url, params)
+
+    api._get_json = MagicMock(side_effect=_get)
+
+    devices, err = api.get_enrolled_devices()
+
+    assert devices is None
+    assert err == "Bad Gateway"
+
+
+def test_get_enrolled_devices_missing_count(api):
+    """Response without device count must return error."""
+    api._get_json = MagicMock(return_value=({"list": []}, None))
+
+    devices, err = api.get_enrolled_devices()
+
+    assert devices is None
+    assert err == "Failed to retrieve device count."
+
+
+""" Tests for get_enrolled_devices """
+""" Tests for _paginate """
+
+
+@pytest.mark.parametrize(
+    ("method", "path"),
+    [
+        ("get_groups", "/group"),
+        ("get_sites", "/site"),
+        ("get_custom_fields", "/template-custom-field"),
+        ("get_available_os_version", "/release"),
+    ],
+)
+def test_paginate_resources(api, method, path):
+    """Paginated resources must fetch remaining pages after count is known, and keep page order."""
+    api._get_json = MagicMock(side_effect=_device_pages(120, 50))
+
+    items, err = getattr(api, method)()
+
+    assert err is None
+    assert [i["id"] for i in items] == [str(i) for i in range(120)]
+    assert api._get_json.call_count == 3
+    assert all(c.kwargs["url"].endswith(path) for c in api._get_json.call_args_list)
+
+
+def test_paginate_missing_list(api):
+    """Response without item list must return error naming the resource."""
+    api._get_json = MagicMock(return_value=({"count": 1}, None))
+
+    items, err = api.get_sites()
+
+    assert items is None
+    assert err == "Failed to retrieve site list."
+
+
+""" Tests for _paginate """
+""" Tests for fetch_device_by_serial_number """
+
+
+def test_fetch_device_by_serial_number_query_params(api):
+    """Search must be sent as query params, so requests encodes special characters."""
+    device = {"serial_number": "12 3&4", "id": "10"}
+    api._zpe_cloud_session.get = MagicMock(return_value=_response(200, json.dumps({"list": [device]})))
+
+    content, err = api.fetch_device_by_serial_number("12 3&4")
+
+    assert err is None
+    assert content == device
+    api._zpe_cloud_session.get.assert_called_once_with(
+        url="https://api.zpecloud.com/device",
+        params={"enrolled": 1, "search": "12 3&4"},
+        timeout=api.timeout,
+    )
+
+
+""" Tests for fetch_device_by_serial_number """
+""" Tests for _get_json """
+
+
+def test_get_json_parse_response_bytes(api):
+    """JSON content must be parsed from raw response bytes."""
+    payload = {"count": 1, "list": [{"serial_number": "1234", "hostname": "nodegrid-ção"}]}
+    api._zpe_cloud_session.get = MagicMock(return_value=_response(200, json.dumps(payload)))
+
+    content, err = api._get_json(url="https://zpecloud.com/api/v1/device")
+
+    assert err is None
+    assert content == payload
+
+
+def test_get_json_request_fail(api):
+    """Failed request must return reason, without parsing body."""
+    api._zpe_cloud_session.get = MagicMock(return_value=_response(502, "<html>", "Bad Gateway"))
+
+    content, err = api._get_json(url="https://zpecloud.com/api/v1/device")
+
+    assert content is None
+    assert err == "Bad Gateway"
+
+
+""" Tests for _get_json """